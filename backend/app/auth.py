@@ -1,8 +1,14 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import bcrypt
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
+from .cache import TTLCache
 from .database import get_db
 from .models import User
 from .schemas import UserCreate, Token
@@ -13,18 +19,178 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))  
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))  # 0 disables the cache
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # cost factor: each +1 doubles the work
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "0")) or os.cpu_count() or 1
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "0")) or 32 * BCRYPT_WORKERS
 
 # ---------------- UTILS ----------------
+def _password_bytes(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes (passlib truncated silently too)
+    return password.encode("utf-8")[:72]
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode("utf-8"))
+    except ValueError:  # not a bcrypt hash
+        return False
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# ---------------- PASSWORD POOL ----------------
+class PasswordPoolBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+    bcrypt releases the GIL while hashing, so throughput scales with the
+    number of workers (up to the core count). At most `max_pending` calls
+    may be queued or running; past that, callers get PasswordPoolBusy
+    instead of an ever-growing queue.
+    """
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None  # created on first use, again after shutdown
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_pending = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _timed(self, submitted_at: float, fn, *args):
+        started_at = time.perf_counter()
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += started_at - submitted_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_seconds += time.perf_counter() - started_at
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy(f"{self.pending} password operations already pending")
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._timed, time.perf_counter(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "rounds": BCRYPT_ROUNDS,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "peak_pending": self.peak_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(1000 * self.wait_seconds / done, 2),
+                "avg_run_ms": round(1000 * self.run_seconds / done, 2),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
+
+
+# ---------------- TOKEN CACHE ----------------
+class TokenCache:
+    """
+    Verified bearer tokens -> the user's column values, so authenticated
+    requests skip the JWT decode and the user query. Entries live at most
+    `ttl` seconds and never past the token's exp. The cache is per process:
+    other workers see a deactivation once their entry expires.
+    """
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._keys_by_email: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()  # don't keep raw tokens around
+
+    def get(self, token: str) -> User | None:
+        """A detached copy of the cached user, or None"""
+        values = self.memory.get(self._key(token))
+        return User(**values) if values is not None else None
+
+    def set(self, token: str, user: User, expires_at: float | None = None):
+        ttl = self.memory.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        key = self._key(token)
+        self.memory.set(key, {c.name: getattr(user, c.name) for c in User.__table__.columns}, ttl=ttl)
+        with self._lock:
+            self._keys_by_email.setdefault(user.email, set()).add(key)
+            if len(self._keys_by_email) > 4 * self.memory.maxsize:
+                # Forget expired/evicted keys so the index stays bounded
+                self._keys_by_email = {
+                    email: live
+                    for email, keys in self._keys_by_email.items()
+                    if (live := {k for k in keys if k in self.memory})
+                }
+
+    def invalidate_user(self, email: str):
+        """Drop every cached token of this user (deactivation, deletion, ...)"""
+        with self._lock:
+            keys = self._keys_by_email.pop(email, ())
+        for key in keys:
+            self.memory.pop(key)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {**self.memory.stats(), "invalidations": self.invalidations}
+
+
+token_cache = TokenCache()
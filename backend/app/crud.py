@@ -1,12 +1,17 @@
+from sqlalchemy import Select, and_, or_, func, case, insert, select, update, type_coerce, String
 from sqlalchemy.orm import Session
 from . import models, schemas, auth
+from .services import lab_features, score_table
+from .services.llm_cache import llm_cache
 
 
 # ======================
 # Users
 # ======================
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = auth.get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str | None = None):
+    # Async callers hash on auth.password_hasher and pass the result in
+    if hashed_password is None:
+        hashed_password = auth.get_password_hash(user.password)
     db_user = models.User(
         name=user.name,
         email=user.email,
@@ -22,6 +27,18 @@ def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
+def set_user_active(db: Session, user_id: int, is_active: bool):
+    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    if not db_user:
+        return None
+    db_user.is_active = is_active
+    db.commit()
+    db.refresh(db_user)
+    # Cached tokens must not outlive a deactivation
+    auth.token_cache.invalidate_user(db_user.email)
+    return db_user
+
+
 # ======================
 # Labs (Identity)
 # ======================
@@ -53,6 +70,9 @@ def create_lab(db: Session, lab: schemas.LabCreate):
         data_source=lab.data_source or "manual"
     )
     db.add(db_lab)
+    db.flush()
+    lab_features.index_lab(db, db_lab)
+    score_table.refresh_lab_scores(db, [db_lab])
     db.commit()
     db.refresh(db_lab)
     return db_lab
@@ -63,6 +83,9 @@ def update_lab(db: Session, lab_id: int, lab: schemas.LabCreate):
         return None
     for field, value in lab.dict().items():
         setattr(db_lab, field, value)
+    lab_features.index_lab(db, db_lab)
+    score_table.refresh_lab_scores(db, [db_lab])
+    llm_cache.invalidate_lab(lab_id, db)
     db.commit()
     db.refresh(db_lab)
     return db_lab
@@ -71,15 +94,165 @@ def delete_lab(db: Session, lab_id: int):
     db_lab = db.query(models.Lab).filter(models.Lab.id == lab_id).first()
     if not db_lab:
         return None
+    # LabFeature / CollaborationScore rows go with it (relationship cascades)
     db.delete(db_lab)
+    llm_cache.invalidate_lab(lab_id, db)
     db.commit()
     return db_lab
 
 
+def _website_key(website: str | None) -> str | None:
+    """example.org for http(s)://(www.)example.org/"""
+    if not website:
+        return None
+    key = website.strip().lower().rstrip("/")
+    for scheme in ("https://", "http://"):
+        if key.startswith(scheme):
+            key = key[len(scheme):]
+            break
+    if key.startswith("www."):
+        key = key[4:]
+    return key or None
+
+
+def _website_variants(key: str) -> list[str]:
+    return [f"{scheme}{www}{key}" for scheme in ("https://", "http://", "") for www in ("www.", "")]
+
+
+def upsert_labs(db: Session, labs: list[schemas.LabCreate]) -> list[tuple[str, int | None, str | None]]:
+    """
+    Create or update many labs in ONE transaction. Existing labs are matched
+    by email (case-insensitive) or by website (ignoring scheme, www. and a
+    trailing slash), all in a single lookup query.
+    Returns one (status, lab_id, reason) per input, status being
+    "created", "updated" or "needs_review" (ambiguous; nothing written).
+    """
+    emails = {lab.email.lower() for lab in labs}
+    sites = {key for lab in labs if (key := _website_key(lab.website))}
+    conditions = [func.lower(models.Lab.email).in_(emails)]
+    if sites:
+        variants = [v for key in sites for v in _website_variants(key)]
+        conditions.append(func.lower(func.rtrim(models.Lab.website, "/")).in_(variants))
+
+    by_email, by_site = {}, {}
+    for existing in db.query(models.Lab).filter(or_(*conditions)):
+        by_email.setdefault((existing.email or "").lower(), []).append(existing)
+        if key := _website_key(existing.website):
+            by_site.setdefault(key, []).append(existing)
+
+    results = []
+    written, created, updated = [], [], []
+    claimed = set()  # emails / websites / lab ids already written by this call
+    for lab in labs:
+        email, site = lab.email.lower(), _website_key(lab.website)
+        matches = {m.id: m for m in by_email.get(email, []) + by_site.get(site, [])}
+        keys = {("email", email), ("site", site)} if site else {("email", email)}
+        keys |= {("lab", lab_id) for lab_id in matches}
+
+        if keys & claimed:
+            results.append(("needs_review", None, "Same email or website as another lab in this import"))
+            continue
+        if len(matches) > 1:
+            ids = ", ".join(str(i) for i in sorted(matches))
+            results.append(("needs_review", None, f"Matches several existing labs ({ids})"))
+            continue
+        claimed |= keys
+
+        if matches:
+            db_lab = next(iter(matches.values()))
+            for field, value in lab.dict().items():
+                setattr(db_lab, field, value)
+            updated.append(db_lab)
+            results.append(("updated", db_lab, None))
+        else:
+            db_lab = models.Lab(**lab.dict())
+            db.add(db_lab)
+            created.append(db_lab)
+            results.append(("created", db_lab, None))
+        written.append(db_lab)
+
+    if written:
+        db.flush()
+        lab_features.index_labs(db, written)
+        score_table.refresh_lab_scores(db, written)
+        for db_lab in updated:
+            llm_cache.invalidate_lab(db_lab.id, db)
+    results = [(status, lab.id if lab is not None else None, reason) for status, lab, reason in results]
+    db.commit()
+    return results
+
 def get_labs(db: Session):
     return db.query(models.Lab).all()
 
 
+# Sortable columns for labs_query; NULLs are folded so keyset comparisons stay total
+LAB_SORT_COLUMNS = {
+    "id": models.Lab.id,
+    "name": func.coalesce(models.Lab.name, ""),
+    "domain": func.coalesce(models.Lab.domain, ""),
+    "country": func.coalesce(models.Lab.country, ""),
+    "total_researchers": func.coalesce(models.Lab.total_researchers, 0),
+    "workload_score": func.coalesce(models.Lab.workload_score, 0),
+    # Compared as stored (SQLite keeps timestamps as text without microseconds)
+    "created_at": type_coerce(models.Lab.created_at, String),
+}
+
+
+def labs_query(
+    domain: str | None = None,
+    country: str | None = None,
+    availability_status: str | None = None,
+    equipment_level: str | None = None,
+    sort: str = "id",
+    descending: bool = False,
+    after: tuple | None = None,
+    limit: int | None = None,
+    fields: list[str] | None = None,
+) -> Select:
+    """
+    Filtered, sorted labs with keyset pagination, as a SELECT that runs on a
+    Session or an AsyncSession.
+    `after` is the (sort value, id) of the last row of the previous page.
+    Rows carry the ORM object as `.Lab` (or, with `fields`, just those
+    columns) plus the `_sort_key` to build the next cursor from.
+    """
+    sort_column = LAB_SORT_COLUMNS[sort]
+    columns = [getattr(models.Lab, f) for f in fields] if fields else [models.Lab]
+    query = select(*columns, sort_column.label("_sort_key"))
+
+    if domain:
+        query = query.where(models.Lab.domain == domain)
+    if country:
+        query = query.where(models.Lab.country == country)
+    if availability_status:
+        query = query.where(models.Lab.availability_status == availability_status)
+    if equipment_level:
+        query = query.where(models.Lab.equipment_level == equipment_level)
+
+    if after is not None:
+        value, last_id = after
+        if sort == "id":
+            query = query.where(models.Lab.id < last_id if descending else models.Lab.id > last_id)
+        elif descending:
+            query = query.where(or_(sort_column < value, and_(sort_column == value, models.Lab.id < last_id)))
+        else:
+            query = query.where(or_(sort_column > value, and_(sort_column == value, models.Lab.id > last_id)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), models.Lab.id.desc())
+    else:
+        query = query.order_by(sort_column, models.Lab.id)
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def query_labs(db: Session, **filters):
+    """labs_query(**filters) run on a sync Session"""
+    return db.execute(labs_query(**filters)).all()
+
+
 def get_lab_by_id(db: Session, lab_id: int):
     return db.query(models.Lab).filter(models.Lab.id == lab_id).first()
 
@@ -101,3 +274,100 @@ def get_researchers_by_lab(db: Session, lab_id: int):
         .filter(models.Researcher.lab_id == lab_id)
         .all()
     )
+
+
+RESEARCHER_CHUNK_SIZE = 500
+
+
+def bulk_upsert_researchers(
+    db: Session,
+    researchers: list[schemas.ResearcherCreate],
+    chunk_size: int = RESEARCHER_CHUNK_SIZE,
+) -> list[tuple[str, int | None, str | None]]:
+    """
+    Upsert many researchers: rows with an email update the researcher with the
+    same (lab_id, email), everything else is inserted. Lab ids and existing
+    researchers are each looked up in one query; writes go out as
+    executemany INSERT / UPDATE statements, committed per chunk.
+    Returns one (status, researcher_id, error) per input, status being
+    "created", "updated" or "error".
+    """
+    lab_ids = {r.lab_id for r in researchers}
+    known_labs = {lab_id for (lab_id,) in db.query(models.Lab.id).filter(models.Lab.id.in_(lab_ids))}
+
+    emails = {r.email.lower() for r in researchers if r.email}
+    existing = {}
+    if emails:
+        rows = db.query(models.Researcher.id, models.Researcher.lab_id, models.Researcher.email).filter(
+            models.Researcher.lab_id.in_(known_labs),
+            func.lower(models.Researcher.email).in_(emails),
+        ).order_by(models.Researcher.id)
+        for researcher_id, lab_id, email in rows:
+            existing.setdefault((lab_id, email.lower()), researcher_id)
+
+    results: list[tuple[str, int | None, str | None]] = [None] * len(researchers)
+    seen = set()
+    for start in range(0, len(researchers), chunk_size):
+        inserts, updates = [], []
+        for i in range(start, min(start + chunk_size, len(researchers))):
+            researcher = researchers[i]
+            if researcher.lab_id not in known_labs:
+                results[i] = ("error", None, f"Lab {researcher.lab_id} not found")
+                continue
+            key = (researcher.lab_id, researcher.email.lower()) if researcher.email else None
+            if key in seen:
+                results[i] = ("error", None, "Same lab_id and email as an earlier row")
+                continue
+            if key:
+                seen.add(key)
+            if key in existing:
+                updates.append({"id": existing[key], **researcher.dict()})
+                results[i] = ("updated", existing[key], None)
+            else:
+                inserts.append((i, researcher.dict()))
+
+        if inserts:
+            # sort_by_parameter_order: ids come back in row order, whatever the driver batches
+            ids = db.scalars(
+                insert(models.Researcher).returning(models.Researcher.id, sort_by_parameter_order=True),
+                [row for _, row in inserts]
+            )
+            for (i, _), researcher_id in zip(inserts, ids):
+                results[i] = ("created", researcher_id, None)
+        if updates:
+            db.execute(update(models.Researcher), updates)
+        db.commit()
+    return results
+
+def _researcher_aggregates():
+    """total, seniors, phd, interns, projects over whatever rows are grouped"""
+    seniority = func.lower(func.coalesce(models.Researcher.seniority, ""))
+    return (
+        func.count(models.Researcher.id),
+        func.coalesce(func.sum(case((seniority == "senior", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((seniority == "phd", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((seniority == "intern", 1), else_=0)), 0),
+        func.coalesce(func.sum(func.coalesce(models.Researcher.projects, 0)), 0),
+    )
+
+
+def researcher_totals_query() -> Select:
+    return select(*_researcher_aggregates())
+
+
+def researcher_counts_by_lab_query() -> Select:
+    """One row per lab (including labs with no researchers), computed by a single GROUP BY"""
+    return (
+        select(models.Lab.id, models.Lab.name, *_researcher_aggregates())
+        .outerjoin(models.Researcher, models.Researcher.lab_id == models.Lab.id)
+        .group_by(models.Lab.id, models.Lab.name)
+        .order_by(models.Lab.id)
+    )
+
+
+def get_researcher_totals(db: Session):
+    return db.execute(researcher_totals_query()).one()
+
+
+def get_researcher_counts_by_lab(db: Session):
+    return db.execute(researcher_counts_by_lab_query()).all()
@@ -1,20 +1,95 @@
 import smtplib
+import time
 from email.message import EmailMessage
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
-def send_email(to_email: str, subject: str, body: str, from_email: str, password: str, smtp_server=os.getenv("SMTP_SERVER"), port=os.getenv("SMTP_PORT")):
-    """
-    Send an email using SMTP
-    """
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+# Reused connections idle longer than this are checked with NOOP before sending
+SMTP_IDLE_CHECK_SECONDS = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+
+
+def build_message(to_email: str, subject: str, body: str, from_email: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = from_email
     msg["To"] = to_email
     msg.set_content(body)
+    return msg
+
+
+def send_email(to_email: str, subject: str, body: str, from_email: str, password: str, smtp_server=os.getenv("SMTP_SERVER"), port=os.getenv("SMTP_PORT")):
+    """
+    Send an email using SMTP
+    """
+    msg = build_message(to_email, subject, body, from_email)
 
     with smtplib.SMTP(smtp_server, port) as server:
         server.starttls()
         server.login(from_email, password)
         server.send_message(msg)
+
+
+class SMTPConnection:
+    """
+    One authenticated SMTP session reused across messages.
+    Connects (STARTTLS + login) lazily and reconnects when the server
+    has dropped an idle session. Not thread-safe: use from one thread.
+    """
+
+    def __init__(self, from_email: str, password: str, smtp_server=None, port=None, starttls: bool = SMTP_STARTTLS):
+        self.from_email = from_email
+        self.password = password
+        self.smtp_server = smtp_server or os.getenv("SMTP_SERVER")
+        self.port = int(port or os.getenv("SMTP_PORT") or 587)
+        self.starttls = starttls
+        self._server: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.port)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.password and server.has_extn("auth"):
+            server.login(self.from_email, self.password)
+        self._server = server
+
+    def _ensure_connected(self):
+        if self._server is not None and time.monotonic() - self._last_used > SMTP_IDLE_CHECK_SECONDS:
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+            except OSError:
+                self.close()
+        if self._server is None:
+            self._connect()
+
+    def send(self, to_email: str, subject: str, body: str):
+        self._ensure_connected()
+        try:
+            self._server.send_message(build_message(to_email, subject, body, self.from_email))
+        except smtplib.SMTPServerDisconnected:
+            # Server closed the session between sends: reconnect once and retry
+            self.close()
+            self._connect()
+            self._server.send_message(build_message(to_email, subject, body, self.from_email))
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,11 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import Base, engine
+from .database import engine, async_engine, SessionLocal
+from .migrations import run_migrations
+from . import auth
 from .routers import labs, researchers, users, collaboration, ideal_lab
 from .routers import doc_ingest
 from dotenv import load_dotenv
 import os
 from .routers import collaboration_ai
+from .services.email_outbox import outbox_worker
+from .services.lab_features import backfill_features
 
 
 
@@ -27,12 +31,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset pagination on GET /labs
 )
 
 # -------------------------
-# Create DB Tables
+# Create / migrate DB schema
 # -------------------------
-Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+# Index labs written before the feature index existed, so scoring reads never write
+with SessionLocal() as _db:
+    backfill_features(_db)
 
 # -------------------------
 # Include Routers
@@ -42,6 +51,33 @@ app.include_router(labs.router)
 app.include_router(researchers.router)
 app.include_router(collaboration.router)
 
+# -------------------------
+# Background email outbox
+# -------------------------
+@app.on_event("startup")
+async def start_outbox_worker():
+    outbox_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_outbox_worker():
+    await outbox_worker.stop()
+
+
+@app.on_event("shutdown")
+def stop_ingest_pool():
+    doc_ingest.shutdown_pool()
+
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    auth.password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
 # -------------------------
 # Root Endpoint
 # -------------------------
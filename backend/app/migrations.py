@@ -0,0 +1,78 @@
+"""
+Versioned schema migrations.
+
+Each migration is (version, name, function(connection)) and runs once, in
+order, inside its own transaction; applied versions are recorded in the
+schema_version table. Migration 1 creates any missing tables from the
+models, so a fresh database already has the latest schema when the later
+migrations run -- they must therefore be idempotent (IF NOT EXISTS /
+checkfirst), which also lets them upgrade databases created by create_all
+before this module existed.
+
+Add a migration by appending to MIGRATIONS; never edit or reorder old ones.
+"""
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base
+from . import models
+
+
+def _create_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _create_indexes(*names: str):
+    def migrate(conn: Connection):
+        wanted = set(names)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in wanted:
+                    index.create(bind=conn, checkfirst=True)
+                    wanted.discard(index.name)
+        if wanted:
+            raise RuntimeError(f"Unknown indexes in migration: {', '.join(sorted(wanted))}")
+    return migrate
+
+
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "secondary indexes for lab filters, researchers and the outbox", _create_indexes(
+        "ix_labs_email",
+        "ix_labs_domain_id",
+        "ix_labs_country_id",
+        "ix_labs_availability_status_id",
+        "ix_researchers_lab_id_email",
+        "ix_email_outbox_status_next_attempt_at",
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine: Engine) -> int:
+    if not inspect(engine).has_table(models.SchemaVersion.__tablename__):
+        return 0
+    with engine.connect() as conn:
+        versions = conn.scalars(select(models.SchemaVersion.version)).all()
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply every pending migration in order. Returns the versions applied."""
+    models.SchemaVersion.__table__.create(bind=engine, checkfirst=True)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Serialize concurrent starters (several workers / replicas)
+                conn.execute(text("SELECT pg_advisory_xact_lock(827301)"))
+            done = conn.scalar(
+                select(models.SchemaVersion.version).where(models.SchemaVersion.version == version)
+            )
+            if done is not None:
+                continue
+            migrate(conn)
+            conn.execute(models.SchemaVersion.__table__.insert().values(version=version, name=name))
+            applied.append(version)
+    return applied
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey,  DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey,  DateTime, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -20,6 +20,12 @@ class User(Base):
 # --------------------
 class Lab(Base):
     __tablename__ = "labs"
+    __table_args__ = (
+        # Equality filters (suggestions, GET /labs) that page/order by id
+        Index("ix_labs_domain_id", "domain", "id"),
+        Index("ix_labs_country_id", "country", "id"),
+        Index("ix_labs_availability_status_id", "availability_status", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -29,7 +35,7 @@ class Lab(Base):
     domain = Column(String)
     sub_domains = Column(String)  # comma-separated
     lab_type = Column(String)
-    email = Column(String)
+    email = Column(String, index=True)
     website = Column(String)
     country = Column(String)
     city = Column(String)
@@ -68,12 +74,26 @@ class Lab(Base):
         back_populates="lab",
         cascade="all, delete-orphan"
     )
+    features = relationship(
+        "LabFeature",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
+    collaboration_score = relationship(
+        "CollaborationScore",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
 
 # --------------------
 # Researchers
 # --------------------
 class Researcher(Base):
     __tablename__ = "researchers"
+    __table_args__ = (
+        # Serves lab_id lookups too (leading column) and the bulk upsert match
+        Index("ix_researchers_lab_id_email", "lab_id", "email"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -130,4 +150,93 @@ class IdealLab(Base):
     # Metadata
     data_source = Column(String, default="manual")
     verified = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# --------------------
+# Lab feature index (normalized, maintained on write)
+# --------------------
+class FeatureToken(Base):
+    __tablename__ = "feature_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    value = Column(String, unique=True, nullable=False)  # stripped + lowercased
+
+
+class LabFeature(Base):
+    __tablename__ = "lab_features"
+
+    lab_id = Column(Integer, ForeignKey("labs.id", ondelete="CASCADE"), primary_key=True)
+
+    # Interned FeatureToken ids, in first-seen order
+    sub_domain_ids = Column(JSON, default=list)
+    computing_ids = Column(JSON, default=list)
+    preferred_domain_ids = Column(JSON, default=list)
+    interest_ids = Column(JSON, default=list)
+
+    # Normalized scalar columns
+    domain_key = Column(String)  # lowercased domain
+    equipment_rank = Column(Integer)  # high=3, medium=2, low=1, unknown=0, empty=NULL
+    availability_code = Column(Integer, default=0)
+
+
+# --------------------
+# LLM response cache (optional persistent tier)
+# --------------------
+class LLMResponse(Base):
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of task + IDEAL lab + top labs
+    lab_ids = Column(String, default="")  # ",3,7,12," so a lab's entries can be found with LIKE
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# --------------------
+# Materialized collaboration scores (against the IDEAL lab)
+# --------------------
+class CollaborationScore(Base):
+    __tablename__ = "collaboration_scores"
+
+    lab_id = Column(Integer, ForeignKey("labs.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+    grade = Column(String)
+    breakdown = Column(JSON)
+    version = Column(String, index=True)  # fingerprint of the IDEAL lab the score was computed against
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# --------------------
+# Outgoing email queue
+# --------------------
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The worker's "due" query: status = 'queued' AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    lab_id = Column(Integer, ForeignKey("labs.id", ondelete="SET NULL"), nullable=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+
+    status = Column(String, default="queued", index=True)  # queued | sending | sent | failed
+    # Next send attempt while queued; end of the worker's claim while sending
+    attempts = Column(Integer, default=0)
+    last_error = Column(String)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+
+# --------------------
+# Applied schema migrations (see app/migrations.py)
+# --------------------
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,11 +1,17 @@
 # backend/app/routers/collaboration.py
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import database, models
-from pydantic import BaseModel
-from ..email import send_email
+from .. import models
+from ..database import get_async_db, get_db
+from pydantic import BaseModel, Field
+from ..services.email_outbox import enqueue_email, new_message, outbox_worker
+from ..services.lab_scoring import select_top
+from ..services.score_table import load_scores
 import os
+import string
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,36 +30,101 @@ class EmailRequest(BaseModel):
     subject: str = None  # Optional, will use default if not provided
     body: str = None     # Optional, will use default if not provided
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+DEFAULT_CAMPAIGN_SUBJECT = "Collaboration Proposal from {ideal_lab}"
+DEFAULT_CAMPAIGN_BODY = """
+Hello {lab_name} Team,
+
+We at {ideal_lab} noticed that our labs share expertise in {ideal_domain}.
+We would like to explore potential collaboration opportunities with your team.
+
+Please let us know if you are interested.
+
+Best regards,
+{ideal_lab} Team
+"""
+
+
+class CampaignRequest(BaseModel):
+    lab_ids: list[int] | None = None  # explicit recipients...
+    top_n: int | None = Field(None, ge=1, le=500)  # ...or the best N labs by collaboration score
+    min_score: float = 0
+    # Placeholders: {lab_name} {lab_domain} {lab_email} {ideal_lab} {ideal_domain} {score} {grade}
+    subject_template: str = DEFAULT_CAMPAIGN_SUBJECT
+    body_template: str = DEFAULT_CAMPAIGN_BODY
+
+
+_FORMATTER = string.Formatter()
+
+
+def parse_template(template: str) -> list[tuple[str, str | None]]:
+    """
+    Split a campaign template into (literal text, placeholder name) pieces.
+    Only plain {name} placeholders are allowed ({{ and }} are literal braces):
+    no attribute or index access, conversions or format specs, since the
+    template comes from the request. Raises ValueError for anything else.
+    """
+    pieces = []
+    for literal, name, spec, conversion in _FORMATTER.parse(template):
+        if name is not None and (not name.isidentifier() or spec or conversion):
+            raise ValueError(f"Unsupported placeholder {{{name}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}}}")
+        pieces.append((literal, name))
+    return pieces
+
+
+def render_template(pieces: list[tuple[str, str | None]], context: dict) -> str:
+    # Unknown placeholders are left in the text instead of failing the campaign
+    return "".join(
+        literal + ("" if name is None else str(context.get(name, "{" + name + "}")))
+        for literal, name in pieces
+    )
+
 
 @router.get("/suggestions")
-def get_suggestions(db: Session = Depends(get_db)):
+async def get_suggestions(db: AsyncSession = Depends(get_async_db)):
+    if not IDEAL_LABS["domain"]:
+        return []
+
+    # One round trip: same-domain labs joined to their researchers' fields
     try:
-        labs = db.query(models.Lab).all()
+        rows = (await db.execute(
+            select(models.Lab.id, models.Lab.name, models.Lab.domain, models.Researcher.field)
+            .outerjoin(
+                models.Researcher,
+                and_(
+                    models.Researcher.lab_id == models.Lab.id,
+                    models.Researcher.field.isnot(None),
+                    models.Researcher.field != ""
+                )
+            )
+            .where(models.Lab.domain == IDEAL_LABS["domain"])
+            .order_by(models.Lab.id, models.Researcher.id)
+        )).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB Error: {e}")
 
-    suggestions = []
-    for lab in labs:
-        if lab.domain and IDEAL_LABS["domain"] and lab.domain == IDEAL_LABS["domain"]:
-            suggestions.append({
-                "id": f"{IDEAL_LABS['id']}_{lab.id}",
+    suggestions = {}
+    for lab_id, lab_name, lab_domain, field in rows:
+        suggestion = suggestions.get(lab_id)
+        if suggestion is None:
+            suggestion = suggestions[lab_id] = {
+                "id": f"{IDEAL_LABS['id']}_{lab_id}",
                 "from_lab_id": IDEAL_LABS["id"],
-                "to_lab_id": lab.id,
+                "to_lab_id": lab_id,
                 "from_lab": IDEAL_LABS["name"],
-                "to_lab": lab.name or f"Lab {lab.id}",
-                "shared_domain": lab.domain,
-                "shared_fields": [r.field for r in lab.researchers if r.field] or ["Example field"]
-            })
-    return suggestions
+                "to_lab": lab_name or f"Lab {lab_id}",
+                "shared_domain": lab_domain,
+                "shared_fields": []
+            }
+        if field:
+            suggestion["shared_fields"].append(field)
+
+    for suggestion in suggestions.values():
+        suggestion["shared_fields"] = suggestion["shared_fields"] or ["Example field"]
+    return list(suggestions.values())
 
 # ✅ UPDATED: Use custom subject/body if provided
-@router.post("/send-email")
+# Queued in the outbox and delivered by the background worker
+@router.post("/send-email", status_code=202)
 def send_collaboration_email(req: EmailRequest, db: Session = Depends(get_db)):
     to_lab = db.query(models.Lab).filter(models.Lab.id == req.to_lab_id).first()
 
@@ -83,6 +154,105 @@ Best regards,
     if not FROM_EMAIL or not EMAIL_PASSWORD:
         raise HTTPException(status_code=500, detail="Email credentials not configured")
 
-    send_email(to_lab.email, subject, body, FROM_EMAIL, EMAIL_PASSWORD)
+    message = enqueue_email(db, to_lab.email, subject, body, lab_id=to_lab.id)
+
+    return {"status": "queued", "id": message.id, "to": to_lab.email, "subject": subject}
+
+
+@router.get("/outbox/{message_id}")
+def get_outbox_message(message_id: int, db: Session = Depends(get_db)):
+    message = db.query(models.EmailOutbox).filter(models.EmailOutbox.id == message_id).first()
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return {
+        "id": message.id,
+        "to": message.to_email,
+        "subject": message.subject,
+        "status": message.status,
+        "attempts": message.attempts,
+        "last_error": message.last_error,
+        "sent_at": message.sent_at
+    }
+
+
+@router.post("/campaign", status_code=202)
+def send_campaign(req: CampaignRequest, db: Session = Depends(get_db)):
+    """
+    Personalized outreach to many labs in one call. Messages are rendered
+    and queued in the outbox in one transaction; the background worker
+    delivers (and retries) them.
+    """
+    if not req.lab_ids and not req.top_n:
+        raise HTTPException(status_code=400, detail="Provide lab_ids or top_n")
+    if req.lab_ids and req.top_n:
+        raise HTTPException(status_code=400, detail="Provide lab_ids or top_n, not both")
+    try:
+        subject_template = parse_template(req.subject_template)
+        body_template = parse_template(req.body_template)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid template: {e}")
+    if not os.getenv("SMTP_EMAIL") or not os.getenv("SMTP_PASSWORD"):
+        raise HTTPException(status_code=500, detail="Email credentials not configured")
+
+    ideal = db.query(models.IdealLab).first()
+    scores = {}
+    if req.top_n:
+        if not ideal:
+            raise HTTPException(status_code=404, detail="IDEAL Lab not configured")
+        table = load_scores(db, ideal)
+        rows = select_top(table.scores, req.top_n, req.min_score)
+        lab_ids = [int(table.lab_ids[r]) for r in rows]
+        scores = {lab_id: float(table.scores[r]) for lab_id, r in zip(lab_ids, rows)}
+    else:
+        lab_ids = list(dict.fromkeys(req.lab_ids))
+
+    labs = {lab.id: lab for lab in db.query(models.Lab).filter(models.Lab.id.in_(lab_ids))}
+    grades = dict(
+        db.query(models.CollaborationScore.lab_id, models.CollaborationScore.grade)
+        .filter(models.CollaborationScore.lab_id.in_(lab_ids))
+    )
+
+    results = []
+    for lab_id in lab_ids:
+        lab = labs.get(lab_id)
+        if lab is None or not lab.email:
+            results.append({
+                "lab_id": lab_id,
+                "lab_name": lab.name if lab else None,
+                "to": None,
+                "status": "skipped",
+                "error": "Lab not found" if lab is None else "Lab has no email"
+            })
+            continue
+
+        context = dict(
+            lab_name=lab.name,
+            lab_domain=lab.domain or "",
+            lab_email=lab.email,
+            ideal_lab=ideal.name if ideal else IDEAL_LABS["name"],
+            ideal_domain=(ideal.domain if ideal else None) or IDEAL_LABS["domain"],
+            score=scores.get(lab_id, ""),
+            grade=grades.get(lab_id, "")
+        )
+        message = new_message(
+            lab.email,
+            render_template(subject_template, context),
+            render_template(body_template, context),
+            lab_id=lab_id
+        )
+        db.add(message)
+        results.append({"lab_id": lab_id, "lab_name": lab.name, "to": lab.email, "message": message})
+    db.commit()
+    outbox_worker.wake()
+
+    for result in results:
+        message = result.pop("message", None)
+        if message is not None:
+            # Track delivery with GET /collaboration/outbox/{outbox_id}
+            result.update({"outbox_id": message.id, "status": "queued", "error": None})
 
-    return {"status": "sent", "to": to_lab.email, "subject": subject}
\ No newline at end of file
+    return {
+        "requested": len(lab_ids),
+        "queued": sum(1 for r in results if r["status"] == "queued"),
+        "results": results
+    }
@@ -1,37 +1,88 @@
-from fastapi import APIRouter, WebSocket, Depends
-from sqlalchemy.orm import Session
-from ..database import SessionLocal
-from ..services.collaboration_ai import CollaborationAIService
+import math
+from contextlib import aclosing
+
+from fastapi import APIRouter, WebSocket, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncSessionLocal, get_async_db
+from ..services.collaboration_ai import CollaborationAIService, TOP_K, MIN_SCORE, MAX_TOP_K
 from openai import RateLimitError, OpenAIError
 
 router = APIRouter(prefix="/collaboration-ai", tags=["Agentic AI"])
 
-def get_db():
-    db = SessionLocal()
+service = CollaborationAIService()
+
+
+# Deeper ranks for the Collaboration page, no LLM involved
+@router.get("/rankings")
+async def get_rankings(
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    min_score: float = Query(0, ge=0, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.run_sync(service.rank_labs, limit=limit, offset=offset, min_score=min_score)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return service.cache.stats()
+
+
+def _number(data: dict, name: str, default: float, low: float, high: float) -> float:
+    """data[name] (or the default) clamped to low..high; ValueError if it isn't a number"""
+    value = data.get(name)
+    if value is None:
+        value = default
     try:
-        yield db
-    finally:
-        db.close()
+        if isinstance(value, bool):
+            raise ValueError
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a number")
+    return min(max(value, low), high)
 
-service = CollaborationAIService()
 
 @router.websocket("/ws")
-async def collaboration_ai_ws(websocket: WebSocket, db: Session = Depends(get_db)):
+async def collaboration_ai_ws(websocket: WebSocket):
+    # No session for the connection's lifetime: an idle dashboard must not pin
+    # a pooled connection, and each task should see current data. Every task
+    # message gets its own short-lived session instead.
     await websocket.accept()
     try:
         while True:
             data = await websocket.receive_json()
-            task = data.get("task")
+            task = data.get("task") if isinstance(data, dict) else None
             if not task:
                 await websocket.send_json({"type": "error", "message": "No task provided."})
                 continue
 
+            try:
+                top_k = int(_number(data, "top_k", TOP_K, 1, MAX_TOP_K))
+                min_score = _number(data, "min_score", MIN_SCORE, 0, 100)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+                continue
+
             await websocket.send_json({
                 "type": "status",
                 "message": "Analyzing collaboration opportunities..."
             })
 
-            result = await service.generate_suggestions(db, task)
+            # Streaming mode: scores first, then recommendations as the model writes them
+            if data.get("stream"):
+                async with AsyncSessionLocal() as db:
+                    # aclosing: a failed send closes the generator (and its OpenAI stream) right away
+                    async with aclosing(service.stream_suggestions(db, task, top_k=top_k, min_score=min_score)) as messages:
+                        async for message in messages:
+                            await websocket.send_json(message)
+                continue
+
+            async with AsyncSessionLocal() as db:
+                result = await service.generate_suggestions(db, task, top_k=top_k, min_score=min_score)
 
             if "error" in result:
                 await websocket.send_json({"type": "error", "message": result["error"]})
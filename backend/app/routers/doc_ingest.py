@@ -1,83 +1,398 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+import asyncio
+import hashlib
 import re
 import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 import pdfplumber
 from docx import Document
 
+from .. import crud, schemas
+from ..database import get_db
+from ..services.ingest_cache import ingest_cache
+
 router = APIRouter(prefix="/ingest", tags=["Document Ingestion"])
 
 
+UNSUPPORTED_TYPE = "Unsupported file type. Upload TXT, PDF, or DOCX."
+UNREADABLE_TEXT = "Could not extract readable text from document"
+SUPPORTED_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or None  # None -> one per CPU
+MAX_BATCH_FILES = int(os.getenv("INGEST_MAX_BATCH_FILES", "500"))
+MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+MAX_PDF_PAGES = int(os.getenv("INGEST_MAX_PDF_PAGES", "0"))  # 0 = no cap; a cap ignores later pages
+SPOOL_CHUNK_BYTES = 1024 * 1024
+# Part of every cache key; bump whenever extraction output changes
+EXTRACTION_VERSION = 2
+# Settings that change extraction output, also part of the cache key
+EXTRACTION_SETTINGS = f"pages{MAX_PDF_PAGES}"
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Parsing is CPU-bound, so it runs in worker processes, off the event loop"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class DocumentError(ValueError):
+    """A document that can't be ingested; the message is safe to show to users"""
+
+
+class DocumentTooLarge(DocumentError):
+    pass
+
+
+def _too_large() -> DocumentTooLarge:
+    return DocumentTooLarge(f"Document exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit")
+
+
+def _temp_path(filename: str | None) -> tuple[int, str]:
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return tempfile.mkstemp(prefix="ingest-", suffix=suffix)
+
+
+async def spool_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> tuple[str, str]:
+    """
+    Copy an upload to a temp file in fixed-size chunks, enforcing max_bytes,
+    and SHA-256 it on the way. Returns (path, hex digest).
+    Only the path travels to the worker process, so memory stays flat.
+    """
+    fd, path = _temp_path(upload.filename)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def _remove(path: str | None):
+    if path:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+async def parse_cached(filename: str, path: str, digest: str, in_flight: dict | None = None) -> dict:
+    """
+    Parse a spooled document in the worker pool, unless a document with the
+    same bytes (and extension) was parsed before. `in_flight` lets a batch
+    parse duplicate files only once.
+    Adds "sha256" and "cache" ("hit" / "miss") to the result.
+    """
+    key = ingest_cache.make_key(digest, filename, EXTRACTION_VERSION, EXTRACTION_SETTINGS)
+    cached = ingest_cache.get(key)
+    if cached is not None:
+        return {"filename": filename, **cached, "sha256": digest, "cache": "hit"}
+
+    if in_flight is not None and key in in_flight:
+        result = await in_flight[key]
+        return {**result, "filename": filename, "sha256": digest, "cache": "miss" if "error" in result else "hit"}
+
+    future = asyncio.get_running_loop().run_in_executor(get_pool(), parse_document, filename, path)
+    if in_flight is not None:
+        in_flight[key] = future
+    result = await future
+    if "error" not in result:
+        ingest_cache.set(key, {k: v for k, v in result.items() if k != "filename"})
+    return {**result, "sha256": digest, "cache": "miss"}
+
+
+def _validation_errors(error: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(p) for p in e['loc']) or 'lab'}: {e['msg']}" for e in error.errors()]
+
+
+def commit_results(db: Session, results: list[dict]) -> dict:
+    """
+    Validate the successfully parsed results against LabCreate and upsert
+    the valid ones in one transaction (crud.upsert_labs). Each result gets a
+    "commit" entry; returns the created / updated / needs_review summary.
+    """
+    valid = []
+    for result in results:
+        if "error" in result:
+            continue
+        try:
+            valid.append((result, schemas.LabCreate(**result["extracted_lab"])))
+        except ValidationError as e:
+            result["commit"] = {"status": "needs_review", "errors": _validation_errors(e)}
+
+    outcomes = crud.upsert_labs(db, [lab for _, lab in valid]) if valid else []
+    for (result, _), (status, lab_id, reason) in zip(valid, outcomes):
+        result["commit"] = {"status": status, "lab_id": lab_id}
+        if reason:
+            result["commit"]["errors"] = [reason]
+
+    summary = {"created": [], "updated": [], "needs_review": []}
+    for result in results:
+        outcome = result.get("commit")
+        if outcome is None:
+            continue
+        if outcome["status"] == "needs_review":
+            summary["needs_review"].append(result["filename"])
+        else:
+            summary[outcome["status"]].append(outcome["lab_id"])
+    return summary
+
+
 @router.post("/document")
-async def ingest_document(file: UploadFile = File(...)):
+async def ingest_document(
+    file: UploadFile = File(...),
+    commit: bool = Query(False, description="Validate and save the extracted lab (upsert by email/website)"),
+    db: Session = Depends(get_db)
+):
     """
     Accepts TXT / PDF / DOCX
     Extracts LabCreate-compatible fields from paragraphs
-    Returns extracted data WITHOUT saving
+    Returns extracted data WITHOUT saving, unless commit=true
+    Re-uploads of identical bytes are answered from the ingest cache
     """
 
-    filename = file.filename.lower()
-
     try:
-        raw = await file.read()
+        path, digest = await spool_upload(file)
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception:
         raise HTTPException(status_code=400, detail="Unable to read document")
 
+    try:
+        result = await parse_cached(file.filename, path, digest)
+    finally:
+        _remove(path)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+
+    response = {
+        "extracted_lab": result["extracted_lab"],
+        "confidence": result["confidence"],
+        "message": result["message"],
+        "sha256": result["sha256"],
+        "cache": result["cache"]
+    }
+    if commit:
+        await run_in_threadpool(commit_results, db, [result])
+        response["commit"] = result["commit"]
+    return response
+
+
+@router.post("/batch")
+async def ingest_batch(
+    files: list[UploadFile] = File(...),
+    commit: bool = Query(False, description="Validate and save the extracted labs in one transaction"),
+    db: Session = Depends(get_db)
+):
+    """
+    Accepts many TXT / PDF / DOCX files and/or ZIP archives of them.
+    Documents are parsed in parallel worker processes.
+    Returns per-file extraction results WITHOUT saving, unless commit=true
+    """
+    # (filename, temp path or None, error or None, sha256 or None)
+    documents = []
+    try:
+        for upload in files:
+            try:
+                path, digest = await spool_upload(upload)
+            except DocumentError as e:
+                documents.append((upload.filename, None, str(e), None))
+                continue
+            except Exception:
+                documents.append((upload.filename, None, "Unable to read document", None))
+                continue
+
+            if (upload.filename or "").lower().endswith(".zip"):
+                try:
+                    documents.extend(unpack_zip(path))
+                except zipfile.BadZipFile as e:
+                    documents.append((upload.filename, None, f"Invalid ZIP archive: {e}", None))
+                except DocumentError as e:
+                    documents.append((upload.filename, None, str(e), None))
+                finally:
+                    _remove(path)
+            else:
+                documents.append((upload.filename, path, None, digest))
+
+            if len(documents) > MAX_BATCH_FILES:
+                raise HTTPException(status_code=413, detail=f"Too many documents (max {MAX_BATCH_FILES})")
+
+        in_flight = {}
+
+        async def parse(filename, path, error, digest):
+            if error:
+                return {"filename": filename, "error": error}
+            return await parse_cached(filename, path, digest, in_flight)
+
+        results = await asyncio.gather(*(parse(*document) for document in documents))
+    finally:
+        for _, path, _, _ in documents:
+            _remove(path)
+
+    failed = sum(1 for r in results if "error" in r)
+
+    response = {
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "cache_hits": sum(1 for r in results if r.get("cache") == "hit"),
+        "results": results
+    }
+    if commit:
+        response["committed"] = await run_in_threadpool(commit_results, db, list(results))
+    return response
+
+
+@router.get("/cache/stats")
+def ingest_cache_stats():
+    return ingest_cache.stats()
+
+
+def unpack_zip(archive_path: str) -> list[tuple[str, str | None, str | None, str | None]]:
+    """
+    Extract the supported documents of a ZIP archive (nested folders allowed)
+    to temp files, each held to the upload size limit and SHA-256'd on the way.
+    """
+    documents = []
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue
+                if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                if len(documents) >= MAX_BATCH_FILES:
+                    raise DocumentError(f"Archive holds more than {MAX_BATCH_FILES} documents")
+                if info.file_size > MAX_UPLOAD_BYTES:
+                    documents.append((name, None, str(_too_large()), None))
+                    continue
+
+                fd, path = _temp_path(name)
+                documents.append((name, path, None, None))
+                digest = hashlib.sha256()
+                with os.fdopen(fd, "wb") as out, archive.open(info) as member:
+                    while chunk := member.read(SPOOL_CHUNK_BYTES):
+                        digest.update(chunk)
+                        out.write(chunk)
+                documents[-1] = (name, path, None, digest.hexdigest())
+    except BaseException:
+        for _, path, _, _ in documents:
+            _remove(path)
+        raise
+    return documents
+
+
+def parse_document(filename: str, source) -> dict:
+    """
+    Text extraction + field extraction for one document.
+    Runs in a worker process, so it only takes and returns plain data
+    (`source` is a file path, or the raw bytes).
+    """
+    try:
+        text = extract_text(filename, source)
+    except DocumentError as e:
+        return {"filename": filename, "error": str(e)}
+    except Exception as e:
+        return {"filename": filename, "error": f"Unable to parse document: {e}"}
+
+    return {
+        "filename": filename,
+        "extracted_lab": extract_lab_fields(text),
+        "confidence": "medium",
+        "message": "Please review and confirm extracted lab details"
+    }
+
+
+def extract_text(filename: str, source) -> str:
+    filename = (filename or "").lower()
+
     # ----------------
     # Extract text by type
     # ----------------
     if filename.endswith(".txt"):
-        text = raw.decode("utf-8", errors="ignore")
+        if isinstance(source, bytes):
+            text = source.decode("utf-8", errors="ignore")
+        else:
+            with open(source, encoding="utf-8", errors="ignore") as f:
+                text = f.read()
     elif filename.endswith(".docx"):
-        text = extract_docx_text(raw)
+        text = extract_docx_text(source)
     elif filename.endswith(".pdf"):
-        text = extract_pdf_text(raw)
+        text = extract_pdf_text(source)
     else:
-        raise HTTPException(
-            status_code=400,
-            detail="Unsupported file type. Upload TXT, PDF, or DOCX."
-        )
+        raise DocumentError(UNSUPPORTED_TYPE)
 
     if not text or len(text.strip()) < 20:
-        raise HTTPException(
-            status_code=400,
-            detail="Could not extract readable text from document"
-        )
+        raise DocumentError(UNREADABLE_TEXT)
+    return text
+
 
+def extract_lab_fields(text: str) -> dict:
+    """
+    One pass over the document text: lowercasing, the domain keyword scan
+    and the role counts are computed once and shared by every field that
+    needs them. All patterns are compiled at import.
+    """
     text_lower = text.lower()
+    is_ascii = text.isascii()
+    domains = find_domains(text_lower)
+    senior = extract_senior_researchers(text)
+    phd = extract_phd_students(text)
+    interns = extract_interns(text)
 
     # ----------------
     # Extract fields
     # ----------------
-    extracted = {
+    return {
         # Core identity
         "name": extract_lab_name(text),
         "description": extract_description(text),
         "lab_type": extract_lab_type(text_lower),
 
         # Domains
-        "domain": extract_primary_domain(text_lower),
-        "sub_domains": extract_sub_domains(text_lower),
-        "preferred_domains": extract_preferred_domains(text_lower),
+        "domain": domains[0] if domains else None,
+        "sub_domains": _join_domains(domains),
+        "preferred_domains": _join_domains(domains) if _has_preferred_marker(text_lower) else None,
 
         # Workforce (FIX #1)
-        "total_researchers": extract_total_researchers(text),
-        "senior_researchers": extract_senior_researchers(text),
-        "phd_students": extract_phd_students(text),
-        "interns": extract_interns(text),
+        "total_researchers": extract_total_researchers(text, senior + phd + interns),
+        "senior_researchers": senior,
+        "phd_students": phd,
+        "interns": interns,
 
         # Projects (FIX #2 & #3)
-        "active_projects": extract_integer(
-            text_lower,
-            ["ongoing projects", "active projects", "managing"]
-        ),
-        "max_project_capacity": extract_integer(
-            text_lower,
-            ["capacity to handle", "maximum projects", "up to"]
-        ),
+        "active_projects": extract_integer(text_lower, ACTIVE_PROJECT_KEYWORDS),
+        "max_project_capacity": extract_integer(text_lower, PROJECT_CAPACITY_KEYWORDS),
 
         # Operations
-        "workload_score": extract_integer(text_lower, ["workload score"]),
+        "workload_score": extract_integer(text_lower, WORKLOAD_KEYWORDS),
         "availability_status": extract_availability(text_lower),
 
         # Resources (FIX #6)
@@ -93,44 +408,68 @@ async def ingest_document(file: UploadFile = File(...)):
         "website": extract_website(text),
 
         # Location (FIX #4 & #5)
-        "country": extract_field(text, "country"),
-        "city": extract_field(text, "city"),
-        "institute": extract_field(text, "institute"),
+        "country": extract_field(text, "country", text_lower, is_ascii),
+        "city": extract_field(text, "city", text_lower, is_ascii),
+        "institute": extract_field(text, "institute", text_lower, is_ascii),
 
         "data_source": "document"
     }
 
-    return {
-        "extracted_lab": extracted,
-        "confidence": "medium",
-        "message": "Please review and confirm extracted lab details"
-    }
-
 
 # =================================================
 # File Type Extractors
 # =================================================
 
-def extract_docx_text(raw: bytes) -> str:
-    doc = Document(io.BytesIO(raw))
+def _open_source(source):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def extract_docx_text(source) -> str:
+    doc = Document(_open_source(source))
     paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
     return "\n".join(paragraphs)
 
 
-def extract_pdf_text(raw: bytes) -> str:
-    text = ""
-    with pdfplumber.open(io.BytesIO(raw)) as pdf:
-        for page in pdf.pages:
+def extract_pdf_text(source, max_pages: int = MAX_PDF_PAGES) -> str:
+    """
+    Page-lazy PDF text: pages are extracted one at a time and released, up
+    to max_pages (0 = all). Every page is read: the description and the
+    domain / resource fields draw on the whole text, so no earlier page is
+    enough on its own. Page texts are joined once at the end.
+    """
+    pages = []
+    with pdfplumber.open(_open_source(source)) as pdf:
+        for number, page in enumerate(pdf.pages, start=1):
             page_text = page.extract_text()
+            page.close()  # drop the page's parsed objects
             if page_text:
-                text += page_text + "\n"
-    return text
+                pages.append(page_text + "\n")
+            if max_pages and number >= max_pages:
+                break
+    return "".join(pages)
 
 
 # =================================================
 # Extraction Helpers
 # =================================================
 
+ACTIVE_PROJECT_KEYWORDS = ["ongoing projects", "active projects", "managing"]
+PROJECT_CAPACITY_KEYWORDS = ["capacity to handle", "maximum projects", "up to"]
+WORKLOAD_KEYWORDS = ["workload score"]
+CITY_COUNTRIES = ("USA", "UK", "Canada", "Pakistan")
+
+LAB_TYPE_RE = re.compile(r"(research laboratory|laboratory|lab|institute)")
+TOTAL_RESEARCHERS_RE = re.compile(r"(\d+)\s+researchers\s+in\s+total", re.IGNORECASE)
+SENIOR_RESEARCHERS_RE = re.compile(r"(\d+)\s+senior\s+researchers", re.IGNORECASE)
+PHD_STUDENTS_RE = re.compile(r"(\d+)\s+(PhD|Ph\.D|phd)\s+(scholars|students)", re.IGNORECASE)
+INTERNS_RE = re.compile(r"(\d+)\s+(research\s+)?interns", re.IGNORECASE)
+EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+WEBSITE_RE = re.compile(r"https?://[^\s\)\]\}]+")
+COUNTRY_RE = re.compile(r"\b(usa|uk|canada|germany|france|india|pakistan)\b")
+CITY_RE = re.compile(r"in\s+([A-Z][a-zA-Z\s]+),\s*(USA|UK|Canada|Pakistan)")
+INSTITUTE_RE = re.compile(r"(at|under)\s+(the\s+)?([A-Z][a-zA-Z\s]+University)")
+
+
 def extract_lab_name(text: str):
     """
     Heuristic:
@@ -156,26 +495,38 @@ def extract_description(text: str):
     return paragraphs[0] if paragraphs else None
 
 
+def find_domains(text_lower: str) -> list[str]:
+    """Known domains mentioned in the text, in domain_keywords() order"""
+    # Plain substring tests beat one big alternation regex here: each is a
+    # single fast scan, and the alternation has to try every branch per offset.
+    return [d for d, d_lower in _DOMAIN_KEYWORDS if d_lower in text_lower]
+
+
+def _join_domains(domains: list[str]):
+    return ", ".join(domains) if domains else None
+
+
+def _has_preferred_marker(text_lower: str) -> bool:
+    return "preferred domains" in text_lower or "open to collaboration" in text_lower
+
+
 def extract_primary_domain(text_lower: str):
-    for d in domain_keywords():
-        if d.lower() in text_lower:
-            return d
-    return None
+    domains = find_domains(text_lower)
+    return domains[0] if domains else None
 
 
 def extract_sub_domains(text_lower: str):
-    found = [d for d in domain_keywords() if d.lower() in text_lower]
-    return ", ".join(found) if found else None
+    return _join_domains(find_domains(text_lower))
 
 
 def extract_preferred_domains(text_lower: str):
-    if "preferred domains" in text_lower or "open to collaboration" in text_lower:
+    if _has_preferred_marker(text_lower):
         return extract_sub_domains(text_lower)
     return None
 
 
 def extract_lab_type(text_lower: str):
-    match = re.search(r"(research laboratory|laboratory|lab|institute)", text_lower)
+    match = LAB_TYPE_RE.search(text_lower)
     return match.group(0).title() if match else None
 
 
@@ -183,54 +534,71 @@ def extract_lab_type(text_lower: str):
 # Workforce Extractors
 # ------------------------
 
-def extract_total_researchers(text: str):
+def extract_total_researchers(text: str, role_total: int | None = None):
     """
     Extracts total researchers from patterns like:
     "X researchers in total"
+    `role_total` is the already-counted senior + PhD + intern sum, if known.
     """
-    match = re.search(r"(\d+)\s+researchers\s+in\s+total", text, re.IGNORECASE)
+    match = TOTAL_RESEARCHERS_RE.search(text)
     if match:
         return int(match.group(1))
     # fallback: sum of all roles
-    total = (
-        extract_senior_researchers(text) +
-        extract_phd_students(text) +
-        extract_interns(text)
-    )
-    return total if total else 0
+    if role_total is None:
+        role_total = (
+            extract_senior_researchers(text) +
+            extract_phd_students(text) +
+            extract_interns(text)
+        )
+    return role_total if role_total else 0
 
 
 def extract_senior_researchers(text: str):
-    match = re.search(r"(\d+)\s+senior\s+researchers", text, re.IGNORECASE)
+    match = SENIOR_RESEARCHERS_RE.search(text)
     return int(match.group(1)) if match else 0
 
 
 def extract_phd_students(text: str):
-    match = re.search(r"(\d+)\s+(PhD|Ph\.D|phd)\s+(scholars|students)", text, re.IGNORECASE)
+    match = PHD_STUDENTS_RE.search(text)
     return int(match.group(1)) if match else 0
 
 
 def extract_interns(text: str):
-    match = re.search(r"(\d+)\s+(research\s+)?interns", text, re.IGNORECASE)
+    match = INTERNS_RE.search(text)
     return int(match.group(1)) if match else 0
 
+
+@lru_cache(maxsize=None)
+def _integer_patterns(keyword: str) -> tuple[re.Pattern, re.Pattern]:
+    return re.compile(rf"{keyword}\D*(\d+)"), re.compile(rf"(\d+)\D*{keyword}")
+
+
 def extract_integer(text_lower: str, keywords: list[str]):
     for k in keywords:
-        pattern1 = rf"{k}\D*(\d+)"
-        pattern2 = rf"(\d+)\D*{k}"
-        match = re.search(pattern1, text_lower)
+        # Neither pattern can match without the keyword itself; skipping the
+        # "(\d+)\D*keyword" scan, which restarts at every digit, is the big win.
+        if k not in text_lower:
+            continue
+        after, before = _integer_patterns(k)
+        match = after.search(text_lower)
         if match:
             return int(match.group(1))
-        match = re.search(pattern2, text_lower)
+        match = before.search(text_lower)
         if match:
             return int(match.group(1))
     return 0
 
 
+@lru_cache(maxsize=None)
+def _level_pattern(keyword: str) -> re.Pattern:
+    return re.compile(rf"{keyword}.*?(high|medium|low)")
+
+
 # FIX #6 – context-aware level extraction
 def extract_level(text_lower: str, keyword: str):
-    pattern = rf"{keyword}.*?(high|medium|low)"
-    match = re.search(pattern, text_lower)
+    if keyword not in text_lower:
+        return None
+    match = _level_pattern(keyword).search(text_lower)
     return match.group(1) if match else None
 
 
@@ -252,44 +620,52 @@ def extract_collaboration(text_lower: str):
 
 
 def extract_email(text: str):
-    match = re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", text)
+    match = EMAIL_RE.search(text)
     return match.group(0) if match else None
 
 
 # FIX #7 – trim punctuation
 def extract_website(text: str):
-    match = re.search(r"https?://[^\s\)\]\}]+", text)
+    match = WEBSITE_RE.search(text)
     return match.group(0).rstrip(".") if match else None
 
 
-def extract_field(text: str, field_name: str):
-    # Labeled format
-    labeled = rf"{field_name}\s*[:\-]\s*(.+)"
-    match = re.search(labeled, text, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
+@lru_cache(maxsize=None)
+def _labeled_pattern(field_name: str) -> re.Pattern:
+    return re.compile(rf"{field_name}\s*[:\-]\s*(.+)", re.IGNORECASE)
 
-    text_lower = text.lower()
+
+def extract_field(text: str, field_name: str, text_lower: str | None = None, is_ascii: bool | None = None):
+    if text_lower is None:
+        text_lower = text.lower()
+    if is_ascii is None:
+        is_ascii = text.isascii()
+
+    # Labeled format. For ASCII text, the case-insensitive match needs the
+    # lowercased label somewhere in text_lower (non-ASCII case folding can differ).
+    if not is_ascii or field_name.lower() in text_lower:
+        match = _labeled_pattern(field_name).search(text)
+        if match:
+            return match.group(1).strip()
 
     # Country
     if field_name.lower() == "country":
-        match = re.search(r"\b(usa|uk|canada|germany|france|india|pakistan)\b", text_lower)
+        match = COUNTRY_RE.search(text_lower)
         return match.group(1).upper() if match else None
 
     # FIX #4 – City
     if field_name.lower() == "city":
-        match = re.search(r"in\s+([A-Z][a-zA-Z\s]+),\s*(USA|UK|Canada|Pakistan)", text)
-        if match:
-            return match.group(1).strip()
+        if any(c in text for c in CITY_COUNTRIES):
+            match = CITY_RE.search(text)
+            if match:
+                return match.group(1).strip()
 
     # FIX #5 – Institute
     if field_name.lower() == "institute":
-        match = re.search(
-            r"(at|under)\s+(the\s+)?([A-Z][a-zA-Z\s]+University)",
-            text
-        )
-        if match:
-            return match.group(3).strip()
+        if "University" in text:
+            match = INSTITUTE_RE.search(text)
+            if match:
+                return match.group(3).strip()
 
     return None
 
@@ -316,3 +692,6 @@ def domain_keywords():
         "Computer Vision",
         "Natural Language Processing"
     ]
+
+
+_DOMAIN_KEYWORDS = [(d, d.lower()) for d in domain_keywords()]
@@ -1,7 +1,12 @@
 # routers/ideal_lab.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import database, models
+from .. import models
+from ..database import get_async_db, get_db
+from ..services.llm_cache import llm_cache
+from ..services.score_table import recompute_all_scores
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/ideal-lab", tags=["IDEAL Lab"])
@@ -38,35 +43,31 @@ class IdealLabSchema(BaseModel):
     class Config:
         from_attributes = True
 
-# DB dependency
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Get IDEAL Lab data
 @router.get("/", response_model=IdealLabSchema)
-def get_ideal_lab(db: Session = Depends(get_db)):
-    lab = db.query(models.IdealLab).first()
+async def get_ideal_lab(db: AsyncSession = Depends(get_async_db)):
+    lab = (await db.scalars(select(models.IdealLab).limit(1))).first()
     if not lab:
         # create default record if not exists
         lab = models.IdealLab(name="IDEAL Labs", domain="Artificial Intelligence")
         db.add(lab)
-        db.commit()
-        db.refresh(lab)
+        await db.commit()
+        await db.refresh(lab)
     return lab
 
 # Update IDEAL Lab data
 @router.put("/", response_model=IdealLabSchema)
-def update_ideal_lab(data: IdealLabSchema, db: Session = Depends(get_db)):
+def update_ideal_lab(data: IdealLabSchema, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     lab = db.query(models.IdealLab).first()
     if not lab:
         raise HTTPException(status_code=404, detail="IDEAL Lab not found")
     
     for key, value in data.dict().items():
         setattr(lab, key, value)
+    # Cached LLM answers were written against the old IDEAL lab
+    llm_cache.invalidate_all(db)
     db.commit()
     db.refresh(lab)
+    # Every stored collaboration score was computed against the old reference lab
+    background_tasks.add_task(recompute_all_scores)
     return lab
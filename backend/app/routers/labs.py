@@ -1,24 +1,134 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+import os
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import crud, schemas, database
+from .. import crud, schemas
+from ..database import get_async_db, get_db
+from ..services import lab_transfer
 
 router = APIRouter(prefix="/labs", tags=["Labs"])
 
-# Dependency
-def get_db():
-    db = database.SessionLocal()
+def _encode_cursor(sort: str, value, lab_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, lab_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
     try:
-        yield db
-    finally:
-        db.close()
+        cursor_sort, value, lab_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort")
+    return value, lab_id
 
 
 # ----------------------
 # Get all labs
 # ----------------------
 @router.get("/", response_model=list[schemas.LabResponse])
-def read_labs(db: Session = Depends(get_db)):
-    return crud.get_labs(db)
+async def read_labs(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
+    domain: str | None = None,
+    country: str | None = None,
+    availability_status: str | None = None,
+    equipment_level: str | None = None,
+    sort: str = Query("id", enum=list(crud.LAB_SORT_COLUMNS)),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: str | None = Query(None, description="Comma-separated LabResponse fields to return"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Without `limit` every matching lab is returned, as before.
+    With `limit`, pages are keyset-paginated: pass the X-Next-Cursor
+    response header back as `cursor` to get the next page.
+    """
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(selected) - set(schemas.LabResponse.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        if "id" not in selected:
+            selected.insert(0, "id")
+
+    result = await db.execute(crud.labs_query(
+        domain=domain,
+        country=country,
+        availability_status=availability_status,
+        equipment_level=equipment_level,
+        sort=sort,
+        descending=order == "desc",
+        after=_decode_cursor(cursor, sort) if cursor else None,
+        limit=limit + 1 if limit else None,
+        fields=selected,
+    ))
+    rows = result.all()
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(sort, last._sort_key, last.id if selected else last.Lab.id)
+
+    if selected:
+        # Projection: skip LabResponse validation and send only the requested columns
+        projected = JSONResponse(jsonable_encoder([{f: getattr(row, f) for f in selected} for row in rows]))
+        if next_cursor:
+            projected.headers["X-Next-Cursor"] = next_cursor
+        return projected
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [row.Lab for row in rows]
+
+
+# ----------------------
+# Bulk import / export
+# ----------------------
+def _transfer_format(fmt: str | None, filename: str | None = None) -> str:
+    if not fmt and filename:
+        fmt = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(os.path.splitext(filename)[1].lower())
+    if fmt not in lab_transfer.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    return fmt
+
+
+@router.post("/import")
+async def import_labs(
+    file: UploadFile = File(...),
+    format: str | None = Query(None, description="csv or ndjson (default: from the file extension)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-create labs from a CSV (header row of LabCreate field names) or
+    NDJSON file. Rows are streamed from the upload, validated, and inserted
+    in chunks with one executemany + commit per chunk. Unknown columns
+    (e.g. id / verified from an export) are ignored.
+    """
+    fmt = _transfer_format(format, file.filename)
+    return await run_in_threadpool(lab_transfer.import_labs, db, file.file, fmt)
+
+
+@router.get("/export")
+def export_labs(format: str = Query("ndjson", enum=list(lab_transfer.FORMATS))):
+    """Stream every lab as CSV or NDJSON without loading the table into memory"""
+    return StreamingResponse(
+        lab_transfer.export_labs(format),
+        media_type=lab_transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="labs.{format}"'}
+    )
 
 
 # ----------------------
@@ -46,4 +156,4 @@ def delete_lab(lab_id: int, db: Session = Depends(get_db)):
     deleted = crud.delete_lab(db, lab_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Lab not found")
-    return deleted
\ No newline at end of file
+    return deleted
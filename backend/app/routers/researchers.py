@@ -1,21 +1,20 @@
-from fastapi import APIRouter, Depends
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import database, models, schemas
+from .. import crud, models, schemas
+from ..database import get_async_db, get_db
 
 router = APIRouter(prefix="/researchers", tags=["Researchers"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # Get all researchers
 @router.get("/", response_model=list[schemas.ResearcherResponse])
-def get_researchers(db: Session = Depends(get_db)):
-    return db.query(models.Researcher).all()
+async def get_researchers(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(models.Researcher))).all()
 
 
 # Create a researcher
@@ -28,38 +27,119 @@ def create_researcher(researcher: schemas.ResearcherBase, db: Session = Depends(
     return db_researcher
 
 
+# Bulk create / update researchers
+MAX_BULK_RESEARCHERS = 10000
+
+
+async def _ndjson_lines(request: Request):
+    """Lines of a streamed NDJSON body, without holding the whole body"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _validate_item(row: int, item) -> tuple[schemas.ResearcherCreate | None, dict | None]:
+    try:
+        return schemas.ResearcherCreate.model_validate(item), None
+    except ValidationError as e:
+        error = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        return None, {"row": row, "status": "error", "error": error}
+
+
+@router.post(
+    "/bulk",
+    openapi_extra={"requestBody": {"content": {
+        "application/json": {"schema": {"type": "array", "items": schemas.ResearcherCreate.model_json_schema()}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+)
+async def bulk_upsert_researchers(request: Request, db: Session = Depends(get_db)):
+    """
+    Body: a JSON array of ResearcherCreate items, or NDJSON (one per line,
+    Content-Type: application/x-ndjson). Rows with an email update the
+    researcher with the same (lab_id, email); the rest are inserted.
+    Returns one outcome per row: created / updated / error.
+    """
+    too_many = HTTPException(status_code=413, detail=f"Too many researchers (max {MAX_BULK_RESEARCHERS})")
+    outcomes = []
+    valid, positions = [], []
+
+    def add(item):
+        row = len(outcomes)
+        if row >= MAX_BULK_RESEARCHERS:
+            raise too_many
+        if isinstance(item, Exception):
+            outcomes.append({"row": row, "status": "error", "error": f"Invalid JSON: {item}"})
+            return
+        researcher, error = _validate_item(row, item)
+        outcomes.append(error)
+        if researcher is not None:
+            valid.append(researcher)
+            positions.append(row)
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        # Validated line by line as the body streams in
+        async for line in _ndjson_lines(request):
+            if not line.strip():
+                continue
+            try:
+                add(json.loads(line))
+            except ValueError as e:
+                add(e)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if len(items) > MAX_BULK_RESEARCHERS:
+            raise too_many
+        for item in items:
+            add(item)
+
+    results = await run_in_threadpool(crud.bulk_upsert_researchers, db, valid) if valid else []
+    for i, (status, researcher_id, error) in zip(positions, results):
+        outcomes[i] = {"row": i, "status": status, "id": researcher_id}
+        if error:
+            outcomes[i]["error"] = error
+
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for outcome in outcomes:
+        counts[outcome["status"]] += 1
+    return {**counts, "total": len(outcomes), "results": outcomes}
+
+
 # Get researchers by lab
 @router.get("/by-lab/{lab_id}", response_model=list[schemas.ResearcherResponse])
-def get_researchers_by_lab(lab_id: int, db: Session = Depends(get_db)):
-    return db.query(models.Researcher).filter(models.Researcher.lab_id == lab_id).all()
+async def get_researchers_by_lab(lab_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(models.Researcher).where(models.Researcher.lab_id == lab_id))).all()
 
 
 # Get summary: number of researchers per lab
 @router.get("/summary")
-def get_researchers_summary(db: Session = Depends(get_db)):
-    labs = db.query(models.Lab).all()
-    researchers = db.query(models.Researcher).all()
-
-    total_researchers = len(researchers)
-    total_seniors = sum(1 for r in researchers if (r.seniority or "").lower() == "senior")
-    total_phd = sum(1 for r in researchers if (r.seniority or "").lower() == "phd")
-    total_interns = sum(1 for r in researchers if (r.seniority or "").lower() == "intern")
-    total_projects = sum(r.projects or 0 for r in researchers)
-
-    labs_summary = []
-
-    for lab in labs:
-        lab_researchers = [r for r in researchers if r.lab_id == lab.id]
-
-        labs_summary.append({
-            "lab_id": lab.id,
-            "lab_name": lab.name,
-            "total": len(lab_researchers),
-            "seniors": sum(1 for r in lab_researchers if (r.seniority or "").lower() == "senior"),
-            "phd": sum(1 for r in lab_researchers if (r.seniority or "").lower() == "phd"),
-            "interns": sum(1 for r in lab_researchers if (r.seniority or "").lower() == "intern"),
-            "projects": sum(r.projects or 0 for r in lab_researchers),
-        })
+async def get_researchers_summary(db: AsyncSession = Depends(get_async_db)):
+    totals = (await db.execute(crud.researcher_totals_query())).one()
+    total_researchers, total_seniors, total_phd, total_interns, total_projects = totals
+    counts_by_lab = (await db.execute(crud.researcher_counts_by_lab_query())).all()
+
+    labs_summary = [
+        {
+            "lab_id": lab_id,
+            "lab_name": lab_name,
+            "total": total,
+            "seniors": seniors,
+            "phd": phd,
+            "interns": interns,
+            "projects": projects,
+        }
+        for lab_id, lab_name, total, seniors, phd, interns, projects in counts_by_lab
+    ]
 
     return {
         "total_researchers": total_researchers,
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
@@ -16,38 +17,79 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
+def _password_pool_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Too many concurrent logins, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+# bcrypt runs on auth.password_hasher's pool, so these handlers are async;
+# their (sync) queries go to the threadpool to keep the event loop free
 @router.post("/register", response_model=schemas.UserResponse)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    if crud.get_user_by_email(db, user.email):
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(crud.get_user_by_email, db, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db, user)
+    try:
+        hashed_password = await auth.password_hasher.hash(user.password)
+    except auth.PasswordPoolBusy:
+        raise _password_pool_busy()
+    return await run_in_threadpool(crud.create_user, db, user, hashed_password)
 
 @router.post("/login", response_model=schemas.Token)
-def login_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, user.email)
-    if not db_user or not auth.verify_password(user.password, db_user.hashed_password):
+async def login_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, user.email)
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        valid = await auth.password_hasher.verify(user.password, db_user.hashed_password)
+    except auth.PasswordPoolBusy:
+        raise _password_pool_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = auth.create_access_token({"sub": db_user.email})
     return {"access_token": token, "token_type": "bearer"}
 
+@router.get("/auth/stats")
+def auth_stats():
+    return {
+        "password_pool": auth.password_hasher.stats(),
+        "token_cache": auth.token_cache.stats()
+    }
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    # Recently verified tokens skip the decode and the user query
+    user = auth.token_cache.get(token)
+    if user is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise HTTPException(status_code=401, detail="Invalid token")
+        except JWTError:
             raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = crud.get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+        user = crud.get_user_by_email(db, email)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        auth.token_cache.set(token, user, payload.get("exp"))
+
+    if user.is_active is False:
+        raise HTTPException(status_code=403, detail="Inactive user")
 
     return user
 
 @router.get("/me", response_model=schemas.UserResponse)
 def read_me(current_user: models.User = Depends(get_current_user)):
     return current_user
+
+@router.post("/me/deactivate", response_model=schemas.UserResponse)
+def deactivate_me(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Also drops the account's cached tokens, so they stop working right away
+    return crud.set_user_active(db, current_user.id, False)
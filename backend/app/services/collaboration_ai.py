@@ -1,21 +1,74 @@
 # backend/app/services/collaboration_ai.py
 
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from openai import OpenAI, OpenAIError
+from openai import AsyncOpenAI, OpenAIError
 
 from ..models import Lab, IdealLab
+from .lab_scoring import LabSnapshot, ScoreBatch, score_snapshot, grade_for, select_top, count_at_least
+from .score_table import load_scores
+from .llm_cache import LLMResponseCache, llm_cache
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+# OPENAI_BASE_URL (read by the client) can point at any OpenAI-compatible server
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+
+# How many top-ranked labs are sent to the LLM, and the minimum score to qualify
+TOP_K = int(os.getenv("COLLAB_TOP_K", "5"))
+MIN_SCORE = float(os.getenv("COLLAB_MIN_SCORE", "0"))
+MAX_TOP_K = 50  # labs per prompt a WebSocket client may ask for
+
+
+async def in_session(db: Session | AsyncSession, fn, *args, **kwargs):
+    """
+    Call sync DB code fn(session, ...): directly on a Session, or through
+    run_sync on an AsyncSession (the scoring code is sync).
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
+
+
+async def release_connection(db: Session | AsyncSession):
+    """
+    End an AsyncSession's read transaction so its pooled connection goes back
+    while the LLM call runs (the scored labs are already plain dicts). The
+    session stays usable; the next query checks a connection out again.
+    """
+    if isinstance(db, AsyncSession):
+        await db.commit()
 
 
 class CollaborationAIService:
-    def __init__(self):
+    def __init__(self, client: AsyncOpenAI | None = None, max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 timeout: float = OPENAI_TIMEOUT, cache: LLMResponseCache = llm_cache):
         self.model_name = "gpt-4o-mini"
+        self._client = client
+        self.cache = cache
+        self.timeout = timeout
+        # Caps in-flight completions; extra requests wait here instead of piling onto the API
+        self._llm_slots = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # Created lazily so importing the app doesn't require an API key
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=OPENAI_API_KEY, timeout=self.timeout)
+        return self._client
+
+    async def _complete(self, messages: list[dict], **kwargs):
+        """Non-blocking chat completion bounded by the concurrency limit and a per-call timeout"""
+        async with self._llm_slots:
+            return await asyncio.wait_for(
+                self.client.chat.completions.create(model=self.model_name, messages=messages, **kwargs),
+                timeout=self.timeout
+            )
 
     def calculate_collaboration_score(self, ideal_lab: IdealLab, target_lab: Lab) -> dict:
         """
@@ -141,47 +194,54 @@ class CollaborationAIService:
             "grade": self._get_grade(score)
         }
 
+    def calculate_collaboration_scores(self, ideal_lab: IdealLab, snapshot: LabSnapshot) -> ScoreBatch:
+        """
+        Score every lab of a columnar snapshot in one vectorized pass.
+        batch.result(i) is identical to calculate_collaboration_score(ideal_lab, lab_i)
+        """
+        return score_snapshot(ideal_lab, snapshot)
+
     def _get_grade(self, score: float) -> str:
         """Convert score to letter grade"""
-        if score >= 80:
-            return "Excellent"
-        elif score >= 60:
-            return "Good"
-        elif score >= 40:
-            return "Fair"
-        elif score >= 30:
-            return "Poor"
-        else:
-            return "Poor"
+        return grade_for(score)
 
-    async def generate_suggestions(self, db: Session, task: str):
+    def _rank(self, db: Session, limit: int, offset: int = 0, min_score: float | None = None):
+        """(ideal_lab, score_table, rows) for the requested ranks, or None without an IDEAL lab"""
         ideal_lab = db.query(IdealLab).first()
-        labs = db.query(Lab).all()
 
         if not ideal_lab:
+            return None
+
+        # Scores are materialized on write; only the selected ranks are fetched in full
+        table = load_scores(db, ideal_lab)
+        return ideal_lab, table, select_top(table.scores, limit, min_score, offset)
+
+    def rank_labs(self, db: Session, limit: int = TOP_K, offset: int = 0, min_score: float | None = MIN_SCORE):
+        """
+        Ranked page of scored labs (best first) without calling the LLM.
+        Only the requested ranks are materialized.
+        """
+        ranked = self._rank(db, limit, offset, min_score)
+
+        if ranked is None:
             return {"error": "IDEAL Lab not configured"}
 
-        # Calculate scores for all labs
-        scored_labs = []
-        for lab in labs:
-            score_data = self.calculate_collaboration_score(ideal_lab, lab)
-            
-            scored_labs.append({
-                "lab_id": lab.id,
-                "lab_name": lab.name,
-                "lab_email": lab.email,  # ✅ Include email for frontend
-                "domain": lab.domain,
-                "score": score_data["score"],
-                "grade": score_data["grade"],
-                "score_breakdown": score_data["breakdown"]
-            })
-
-        # Sort by score (descending)
-        scored_labs.sort(key=lambda x: x["score"], reverse=True)
+        _, table, rows = ranked
+        return {
+            "total": count_at_least(table.scores, min_score),
+            "offset": offset,
+            "limit": limit,
+            "labs": table.scored_labs(db, rows)
+        }
 
-        # Use GPT to generate reasoning and project recommendations
-        top_labs = scored_labs[:5]  # Top 5 only
-        
+    def _top_labs(self, db: Session, top_k: int, min_score: float | None):
+        ranked = self._rank(db, top_k, 0, min_score)
+        if ranked is None:
+            return None, None
+        ideal_lab, table, rows = ranked
+        return ideal_lab, table.scored_labs(db, rows)
+
+    def _build_prompt(self, task: str, top_labs: list[dict], json_lines: bool = False) -> str:
         labs_for_gpt = [
             {
                 "lab_name": l["lab_name"],
@@ -192,7 +252,22 @@ class CollaborationAIService:
             for l in top_labs
         ]
 
-        prompt = f"""
+        if json_lines:
+            output_format = """Return ONLY JSON Lines: one JSON object per line, one line per lab, no wrapper and no code fences:
+{"lab_name": "...", "reason": "...", "recommended_projects": ["...", "...", "..."]}"""
+        else:
+            output_format = """Return ONLY valid JSON in this format:
+{
+  "recommendations": [
+    {
+      "lab_name": "...",
+      "reason": "...",
+      "recommended_projects": ["...", "...", "..."]
+    }
+  ]
+}"""
+
+        return f"""
 You are a research collaboration advisor.
 
 IDEAL Lab wants to find collaboration opportunities.
@@ -205,23 +280,53 @@ For EACH lab, provide:
 1. A brief reason WHY this collaboration makes sense (2-3 sentences)
 2. 2-3 specific project ideas they could work on together
 
-Return ONLY valid JSON in this format:
-{{
-  "recommendations": [
-    {{
-      "lab_name": "...",
-      "reason": "...",
-      "recommended_projects": ["...", "...", "..."]
-    }}
-  ]
-}}
+{output_format}
 """
 
+    def _merge_recommendation(self, lab: dict, gpt_rec: dict) -> dict:
+        return {
+            **lab,  # Include all score data + email
+            "reason": gpt_rec.get("reason", "Potential collaboration opportunity"),
+            "recommended_projects": gpt_rec.get("recommended_projects", [])
+        }
+
+    @staticmethod
+    def _covers(gpt_recs: dict, top_labs: list[dict]) -> bool:
+        """
+        Only answers with a recommendation for every lab are cached; an empty
+        or partial parse would otherwise be replayed as the default text.
+        """
+        return bool(gpt_recs) and all(lab["lab_name"] in gpt_recs for lab in top_labs)
+
+    def _system_message(self) -> dict:
+        return {"role": "system", "content": "You are a helpful research collaboration advisor. Always respond with valid JSON."}
+
+    async def generate_suggestions(self, db: Session | AsyncSession, task: str, top_k: int = TOP_K, min_score: float | None = MIN_SCORE):
+        ideal_lab, top_labs = await in_session(db, self._top_labs, top_k, min_score)
+
+        if ideal_lab is None:
+            return {"error": "IDEAL Lab not configured"}
+
+        # Same task against the same IDEAL lab and top labs -> reuse the earlier answer
+        cache_key = self.cache.make_key(task, ideal_lab, top_labs, self.model_name)
+        gpt_recs = await in_session(db, lambda session: self.cache.get(cache_key, session))
+        if gpt_recs is not None:
+            return {
+                "recommendations": [
+                    self._merge_recommendation(lab, gpt_recs.get(lab["lab_name"], {}))
+                    for lab in top_labs
+                ],
+                "cached": True
+            }
+        await release_connection(db)
+
+        # Use GPT to generate reasoning and project recommendations
+        prompt = self._build_prompt(task, top_labs)
+
         try:
-            response = client.chat.completions.create(
-                model=self.model_name,
+            response = await self._complete(
                 messages=[
-                    {"role": "system", "content": "You are a helpful research collaboration advisor. Always respond with valid JSON."},
+                    self._system_message(),
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
@@ -238,23 +343,22 @@ Return ONLY valid JSON in this format:
 
             gpt_data = json.loads(text)
 
-            # Merge GPT insights with our scored data
-            final_recommendations = []
-            for lab in top_labs:
-                # Find matching GPT recommendation
-                gpt_rec = next(
-                    (r for r in gpt_data.get("recommendations", []) 
-                     if r.get("lab_name") == lab["lab_name"]),
-                    {}
-                )
+            # Keep the first recommendation given for each of our labs
+            lab_names = {lab["lab_name"] for lab in top_labs}
+            gpt_recs = {}
+            for rec in gpt_data.get("recommendations", []):
+                if rec.get("lab_name") in lab_names:
+                    gpt_recs.setdefault(rec["lab_name"], rec)
+            if self._covers(gpt_recs, top_labs):
+                await in_session(db, lambda session: self.cache.set(cache_key, gpt_recs, [lab["lab_id"] for lab in top_labs], session))
 
-                final_recommendations.append({
-                    **lab,  # Include all score data + email
-                    "reason": gpt_rec.get("reason", "Potential collaboration opportunity"),
-                    "recommended_projects": gpt_rec.get("recommended_projects", [])
-                })
+            # Merge GPT insights with our scored data
+            final_recommendations = [
+                self._merge_recommendation(lab, gpt_recs.get(lab["lab_name"], {}))
+                for lab in top_labs
+            ]
 
-            return {"recommendations": final_recommendations}
+            return {"recommendations": final_recommendations, "cached": False}
 
         except json.JSONDecodeError as e:
             return {
@@ -262,8 +366,130 @@ Return ONLY valid JSON in this format:
                 "raw_response": text if 'text' in locals() else None
             }
 
+        except asyncio.TimeoutError:
+            return {"error": f"OpenAI request timed out after {self.timeout:g}s"}
+
         except OpenAIError as e:
             return {"error": f"OpenAI API error: {str(e)}"}
 
         except Exception as e:
-            return {"error": f"Unexpected error: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Unexpected error: {str(e)}"}
+
+    async def stream_suggestions(self, db: Session | AsyncSession, task: str, top_k: int = TOP_K, min_score: float | None = MIN_SCORE):
+        """
+        Streaming variant of generate_suggestions. Yields WebSocket messages:
+        - {"type": "scores"}: scored top labs, sent before the LLM is called
+        - {"type": "token"}: raw completion text as it arrives
+        - {"type": "recommendation"}: one lab merged with its reason/projects, as soon as its line is complete
+        - {"type": "result"}: the same payload generate_suggestions returns
+        """
+        ideal_lab, top_labs = await in_session(db, self._top_labs, top_k, min_score)
+
+        if ideal_lab is None:
+            yield {"type": "error", "message": "IDEAL Lab not configured"}
+            return
+
+        yield {"type": "scores", "data": {"labs": top_labs}}
+
+        cache_key = self.cache.make_key(task, ideal_lab, top_labs, self.model_name)
+        gpt_recs = await in_session(db, lambda session: self.cache.get(cache_key, session))
+        if gpt_recs is not None:
+            recommendations = [
+                self._merge_recommendation(lab, gpt_recs.get(lab["lab_name"], {}))
+                for lab in top_labs
+            ]
+            for recommendation in recommendations:
+                yield {"type": "recommendation", "data": recommendation}
+            yield {"type": "result", "data": {"recommendations": recommendations, "cached": True}}
+            return
+        await release_connection(db)
+
+        labs_by_name = {lab["lab_name"]: lab for lab in top_labs}
+        gpt_recs = {}
+        prompt = self._build_prompt(task, top_labs, json_lines=True)
+
+        def parse_line(line: str):
+            line = line.strip().strip("`").strip()
+            if not line.startswith("{"):
+                return None
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                return None
+            lab = labs_by_name.get(rec.get("lab_name"))
+            if lab is None or rec["lab_name"] in gpt_recs:
+                return None
+            gpt_recs[rec["lab_name"]] = rec
+            return {"type": "recommendation", "data": self._merge_recommendation(lab, rec)}
+
+        try:
+            async with self._llm_slots:
+                stream = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=self.model_name,
+                        messages=[
+                            self._system_message(),
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.7,
+                        max_tokens=800,
+                        stream=True
+                    ),
+                    timeout=self.timeout
+                )
+
+                # Closed on every exit (timeouts, errors, the client going away
+                # mid-stream) so the HTTP connection doesn't outlive the request
+                try:
+                    buffer = ""
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            # Timeout applies to the gap between chunks, not the whole stream
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                        except StopAsyncIteration:
+                            break
+
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if not delta:
+                            continue
+                        yield {"type": "token", "content": delta}
+
+                        buffer += delta
+                        *lines, buffer = buffer.split("\n")
+                        for line in lines:
+                            message = parse_line(line)
+                            if message:
+                                yield message
+
+                    message = parse_line(buffer)
+                    if message:
+                        yield message
+                finally:
+                    await stream.close()
+
+        except asyncio.TimeoutError:
+            yield {"type": "error", "message": f"OpenAI request timed out after {self.timeout:g}s"}
+            return
+
+        except OpenAIError as e:
+            yield {"type": "error", "message": f"OpenAI API error: {str(e)}"}
+            return
+
+        except Exception as e:
+            yield {"type": "error", "message": f"Unexpected error: {str(e)}"}
+            return
+
+        if self._covers(gpt_recs, top_labs):
+            await in_session(db, lambda session: self.cache.set(cache_key, gpt_recs, [lab["lab_id"] for lab in top_labs], session))
+
+        yield {
+            "type": "result",
+            "data": {
+                "recommendations": [
+                    self._merge_recommendation(lab, gpt_recs.get(lab["lab_name"], {}))
+                    for lab in top_labs
+                ],
+                "cached": False
+            }
+        }
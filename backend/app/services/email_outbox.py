@@ -0,0 +1,218 @@
+# backend/app/services/email_outbox.py
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .. import database
+from ..email import SMTPConnection
+from ..models import EmailOutbox
+
+load_dotenv()
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "30"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "10"))
+# How long a claimed batch stays "sending" before another worker may retry it
+OUTBOX_CLAIM_SECONDS = float(os.getenv("OUTBOX_CLAIM_SECONDS", "300"))
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def new_message(to_email: str, subject: str, body: str, lab_id: int | None = None) -> EmailOutbox:
+    """An outbox row due now; the caller adds it, commits and wakes the worker."""
+    return EmailOutbox(
+        lab_id=lab_id,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status="queued",
+        next_attempt_at=_now()
+    )
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str, lab_id: int | None = None) -> EmailOutbox:
+    """Persist a message for the background worker and wake it up."""
+    message = new_message(to_email, subject, body, lab_id=lab_id)
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    outbox_worker.wake()
+    return message
+
+
+def record_result(message: EmailOutbox, error: Exception | None):
+    """Mark a send attempt on an outbox row: sent, retry later with backoff, or give up."""
+    message.attempts = (message.attempts or 0) + 1
+    if error is None:
+        message.status = "sent"
+        message.sent_at = _now()
+        message.last_error = None
+    elif message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = "failed"
+        message.last_error = str(error)
+    else:
+        message.status = "queued"
+        message.last_error = str(error)
+        message.next_attempt_at = _now() + timedelta(seconds=OUTBOX_BACKOFF_SECONDS * 2 ** (message.attempts - 1))
+
+
+def claim_due(db: Session, limit: int) -> list[EmailOutbox]:
+    """
+    Move up to `limit` due rows from "queued" to "sending" and return the ones
+    this call won. The status check in the UPDATE makes the claim atomic, so
+    workers in other processes never send the same row twice. While a row is
+    "sending", next_attempt_at holds the end of its claim.
+    """
+    due_ids = db.scalars(
+        select(EmailOutbox.id)
+        .where(EmailOutbox.status == "queued", EmailOutbox.next_attempt_at <= _now())
+        .order_by(EmailOutbox.id)
+        .limit(limit)
+    ).all()
+    if not due_ids:
+        return []
+    claimed_ids = db.scalars(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due_ids), EmailOutbox.status == "queued")
+        .values(status="sending", next_attempt_at=_now() + timedelta(seconds=OUTBOX_CLAIM_SECONDS))
+        .returning(EmailOutbox.id),
+        execution_options={"synchronize_session": False}
+    ).all()
+    db.commit()
+    if not claimed_ids:
+        return []
+    return db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed_ids)).order_by(EmailOutbox.id).all()
+
+
+def requeue_interrupted(db: Session) -> int:
+    """
+    Put rows whose claim ran out while "sending" (the worker crashed or was
+    restarted mid-batch) back in the queue, due now. Returns how many.
+    """
+    result = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == "sending", EmailOutbox.next_attempt_at <= _now())
+        .values(status="queued", next_attempt_at=_now())
+    )
+    db.commit()
+    return result.rowcount
+
+
+class OutboxWorker:
+    """
+    Drains email_outbox in batches over one reused SMTP connection.
+    SMTP I/O runs on a single dedicated thread (the connection is not
+    thread-safe); the event loop only waits on it.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp-outbox")
+        self._connection: SMTPConnection | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._loop is not None:
+            await self._loop.run_in_executor(self._executor, self._close_connection)
+            self._loop = None
+            self._wakeup = None
+
+    def wake(self):
+        """Safe to call from request threads"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                sent = await self._loop.run_in_executor(self._executor, self.send_due_batch)
+            except Exception as e:
+                print("Outbox worker error:", e)
+                sent = 0
+            if sent >= self.batch_size:
+                continue  # more may be waiting
+            try:
+                timeout = await self._loop.run_in_executor(self._executor, self.seconds_until_next_due)
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _get_connection(self) -> SMTPConnection:
+        if self._connection is None:
+            self._connection = SMTPConnection(os.getenv("SMTP_EMAIL"), os.getenv("SMTP_PASSWORD"))
+        return self._connection
+
+    def _close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def seconds_until_next_due(self) -> float:
+        """Sleep until the earliest scheduled retry, capped at the poll interval"""
+        db = database.SessionLocal()
+        try:
+            next_due = (
+                db.query(func.min(EmailOutbox.next_attempt_at))
+                .filter(EmailOutbox.status == "queued")
+                .scalar()
+            )
+        finally:
+            db.close()
+        if next_due is None:
+            return self.poll_seconds
+        if next_due.tzinfo is None:
+            next_due = next_due.replace(tzinfo=timezone.utc)  # SQLite drops the offset
+        return min(self.poll_seconds, max(0.0, (next_due - _now()).total_seconds()))
+
+    def send_due_batch(self) -> int:
+        """Claim and send up to batch_size due messages. Returns how many were attempted."""
+        db = database.SessionLocal()
+        try:
+            requeue_interrupted(db)
+            batch = claim_due(db, self.batch_size)
+            if not batch:
+                return 0
+
+            connection = self._get_connection()
+            for message in batch:
+                try:
+                    connection.send(message.to_email, message.subject, message.body)
+                    error = None
+                except Exception as e:
+                    # Start the next message on a fresh session
+                    self._close_connection()
+                    connection = self._get_connection()
+                    error = e
+                record_result(message, error)
+                db.commit()
+            return len(batch)
+        finally:
+            db.close()
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,100 @@
+# backend/app/services/ingest_cache.py
+
+import copy
+import json
+import os
+import tempfile
+import time
+
+from ..cache import TTLCache
+
+INGEST_CACHE_SIZE = int(os.getenv("INGEST_CACHE_SIZE", "512"))
+INGEST_CACHE_TTL = float(os.getenv("INGEST_CACHE_TTL", "86400"))
+# Optional directory for a second, on-disk tier that survives restarts ("" = memory only)
+INGEST_CACHE_DIR = os.getenv("INGEST_CACHE_DIR", "")
+
+
+class IngestCache:
+    """
+    Caches document parse results keyed on the SHA-256 of the uploaded bytes,
+    the file extension (it picks the parser), the extraction version and the
+    settings that change extraction output (e.g. the PDF page cap).
+    Memory is a bounded LRU; the optional disk tier keeps one JSON file per key.
+    """
+
+    def __init__(self, maxsize: int = INGEST_CACHE_SIZE, ttl: float = INGEST_CACHE_TTL, directory: str = INGEST_CACHE_DIR):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.directory = directory or None
+        self.disk_hits = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(digest: str, filename: str | None, version: int, settings: str = "") -> str:
+        extension = os.path.splitext(filename or "")[1].lower().lstrip(".") or "none"
+        return f"v{version}{'-' + settings if settings else ''}-{extension}-{digest}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        result = self.memory.get(key)
+        if result is not None:
+            return copy.deepcopy(result)  # callers may edit the extracted fields
+        if not self.directory:
+            return None
+
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) < time.time() - self.memory.ttl:
+                os.unlink(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self.disk_hits += 1
+        self.memory.set(key, copy.deepcopy(result))
+        return result
+
+    def set(self, key: str, result: dict):
+        self.memory.set(key, copy.deepcopy(result))
+        if not self.directory:
+            return
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self._path(key))
+            tmp_path = None
+        except (OSError, TypeError, ValueError) as e:
+            print("Ingest cache write failed:", e)
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        self.memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    try:
+                        os.unlink(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "disk": self.directory is not None,
+            "disk_hits": self.disk_hits,
+        }
+
+
+ingest_cache = IngestCache()
@@ -0,0 +1,132 @@
+# backend/app/services/lab_features.py
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import Lab, LabFeature, FeatureToken
+from .lab_scoring import LabSnapshot, split_tokens, equipment_rank, availability_code
+
+
+_INSERT_IGNORING_CONFLICTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+# Below SQLite's bound-parameter limit
+_TOKEN_LOOKUP_BATCH = 900
+
+
+def _token_ids(db: Session, tokens) -> dict[str, int]:
+    return dict(
+        db.query(FeatureToken.value, FeatureToken.id)
+        .filter(FeatureToken.value.in_(tokens))
+        .all()
+    )
+
+
+def intern_tokens(db: Session, tokens: set[str]) -> dict[str, int]:
+    """
+    Map token values to FeatureToken ids, inserting the unknown ones.
+    INSERT ... ON CONFLICT DO NOTHING, then a re-select: a concurrent writer
+    adding the same token doesn't fail either transaction.
+    """
+    if not tokens:
+        return {}
+    ids = _token_ids(db, tokens)
+    missing = [{"value": t} for t in tokens if t not in ids]
+    if missing:
+        dialect_insert = _INSERT_IGNORING_CONFLICTS.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            db.execute(dialect_insert(FeatureToken).on_conflict_do_nothing(index_elements=["value"]), missing)
+        else:
+            db.execute(insert(FeatureToken), missing)
+        ids.update(_token_ids(db, [row["value"] for row in missing]))
+    return ids
+
+
+def index_labs(db: Session, labs: list[Lab]):
+    """
+    (Re)build the feature rows of the given labs inside the caller's
+    transaction. Labs must already have an id (flush before calling).
+    """
+    parsed = [
+        (
+            lab,
+            split_tokens(lab.sub_domains),
+            split_tokens(lab.computing_resources),
+            split_tokens(lab.preferred_domains),
+            split_tokens(lab.collaboration_interests),
+        )
+        for lab in labs
+    ]
+    ids = intern_tokens(db, {t for _, *columns in parsed for tokens in columns for t in tokens})
+
+    for lab, subs, comp, preferred, interests in parsed:
+        feature = lab.features
+        if feature is None:
+            feature = lab.features = LabFeature(lab_id=lab.id)
+        feature.sub_domain_ids = [ids[t] for t in subs]
+        feature.computing_ids = [ids[t] for t in comp]
+        feature.preferred_domain_ids = [ids[t] for t in preferred]
+        feature.interest_ids = [ids[t] for t in interests]
+        feature.domain_key = lab.domain.lower() if lab.domain else None
+        feature.equipment_rank = equipment_rank(lab.equipment_level)
+        feature.availability_code = availability_code(lab.availability_status)
+
+
+def index_lab(db: Session, lab: Lab):
+    index_labs(db, [lab])
+
+
+def backfill_features(db: Session) -> int:
+    """
+    Index labs that predate the feature index (run at startup; every write
+    path indexes its labs). Returns how many were indexed.
+    """
+    labs = (
+        db.query(Lab)
+        .outerjoin(LabFeature, LabFeature.lab_id == Lab.id)
+        .filter(LabFeature.lab_id.is_(None))
+        .all()
+    )
+    if labs:
+        index_labs(db, labs)
+        db.commit()
+    return len(labs)
+
+
+def _token_values(db: Session, token_ids: set[int]) -> dict[int, str]:
+    """FeatureToken values for the given ids, fetched in bounded IN lists."""
+    token_ids = sorted(token_ids)
+    vocab = {}
+    for start in range(0, len(token_ids), _TOKEN_LOOKUP_BATCH):
+        vocab.update(
+            db.query(FeatureToken.id, FeatureToken.value)
+            .filter(FeatureToken.id.in_(token_ids[start:start + _TOKEN_LOOKUP_BATCH]))
+            .all()
+        )
+    return vocab
+
+
+def load_snapshot(db: Session, lab_ids: list[int] | None = None) -> LabSnapshot:
+    """
+    Columnar snapshot of all (or the given) labs read from the precomputed
+    feature index. Only the tokens these labs' scored columns reference are
+    loaded: an IDEAL token outside them can't overlap anyway.
+    """
+    rows = (
+        db.query(
+            Lab.id, Lab.name, Lab.email, Lab.domain,
+            LabFeature.domain_key, LabFeature.sub_domain_ids, LabFeature.computing_ids,
+            LabFeature.equipment_rank, Lab.total_researchers,
+            LabFeature.availability_code, Lab.workload_score,
+        )
+        .join(LabFeature, LabFeature.lab_id == Lab.id)
+        .order_by(Lab.id)
+    )
+    if lab_ids is not None:
+        rows = rows.filter(Lab.id.in_(lab_ids))
+    rows = rows.all()
+    vocab = _token_values(db, {
+        token_id
+        for row in rows
+        for token_id in (row.sub_domain_ids or []) + (row.computing_ids or [])
+    })
+    return LabSnapshot.from_index(rows, vocab)
@@ -0,0 +1,373 @@
+# backend/app/services/lab_scoring.py
+
+import heapq
+
+import numpy as np
+
+from ..models import Lab, IdealLab
+
+
+EQUIPMENT_LEVELS = {"high": 3, "medium": 2, "low": 1}
+
+# Domain relation codes (per distinct target domain)
+DOMAIN_NONE, DOMAIN_PERFECT, DOMAIN_PARTIAL, DOMAIN_DIFFERENT = 0, 1, 2, 3
+
+# Availability codes
+AVAILABILITY_NONE, AVAILABILITY_OTHER, AVAILABILITY_AVAILABLE, AVAILABILITY_BUSY = 0, 1, 2, 3
+
+
+def split_tokens(value: str | None) -> list[str]:
+    """
+    Split a comma-separated column into normalized tokens.
+    Keeps first-seen order and drops duplicates, so set(tokens)
+    matches what the per-lab scorer builds.
+    """
+    if not value:
+        return []
+    return list(dict.fromkeys(s.strip().lower() for s in value.split(",")))
+
+
+def equipment_rank(value: str | None) -> int | None:
+    """Numeric equipment level, or None when the column is empty"""
+    if not value:
+        return None
+    return EQUIPMENT_LEVELS.get(value.lower(), 0)
+
+
+def availability_code(value: str | None) -> int:
+    if not value:
+        return AVAILABILITY_NONE
+    value = value.lower()
+    if value == "available":
+        return AVAILABILITY_AVAILABLE
+    if value == "busy":
+        return AVAILABILITY_BUSY
+    return AVAILABILITY_OTHER
+
+
+class _TokenColumn:
+    """CSR-style storage of per-lab token ids (offsets + flat token array)."""
+
+    def __init__(self, per_lab_ids: list[list[int]], present: list[bool]):
+        counts = np.fromiter((len(ids) for ids in per_lab_ids), dtype=np.int64, count=len(per_lab_ids))
+        self.offsets = np.zeros(len(per_lab_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.tokens = np.fromiter(
+            (t for ids in per_lab_ids for t in ids), dtype=np.int64, count=int(self.offsets[-1])
+        )
+        self.rows = np.repeat(np.arange(len(per_lab_ids), dtype=np.int64), counts)
+        self.present = np.asarray(present, dtype=bool)
+
+    def row_tokens(self, row: int) -> np.ndarray:
+        return self.tokens[self.offsets[row]:self.offsets[row + 1]]
+
+    def overlap_counts(self, ideal_ids: list[int]) -> np.ndarray:
+        n = len(self.present)
+        if not ideal_ids or not len(self.tokens):
+            return np.zeros(n, dtype=np.int64)
+        hits = np.isin(self.tokens, np.asarray(ideal_ids, dtype=np.int64))
+        return np.bincount(self.rows[hits], minlength=n)
+
+
+class LabSnapshot:
+    """
+    Columnar, read-only snapshot of every Lab used for bulk scoring.
+    String columns are normalized once and interned into integer codes,
+    so scoring never re-lowercases or re-splits anything per request.
+    """
+
+    def __init__(self, vocab: dict[int, str] | None = None):
+        self.lab_ids: list[int] = []
+        self.names: list[str] = []
+        self.emails: list[str] = []
+        self.domains: list[str] = []
+        self.vocab: dict[int, str] = dict(vocab or {})
+        self._token_ids: dict[str, int] = {token: token_id for token_id, token in self.vocab.items()}
+        self._next_token_id = max(self.vocab, default=-1) + 1
+        self.domain_vocab: list[str] = []
+
+    def __len__(self):
+        return len(self.lab_ids)
+
+    def token_id(self, token: str) -> int:
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = self._next_token_id
+            self._next_token_id += 1
+            self.vocab[token_id] = token
+        return token_id
+
+    def lookup_tokens(self, tokens: list[str]) -> list[int]:
+        """Ids of tokens known to this snapshot (unknown tokens can't overlap)."""
+        return [self._token_ids[t] for t in tokens if t in self._token_ids]
+
+    @classmethod
+    def from_labs(cls, labs: list[Lab]) -> "LabSnapshot":
+        """Build by normalizing Lab rows in-process."""
+        snap = cls()
+        snap._fill(
+            (
+                lab.id, lab.name, lab.email, lab.domain,
+                lab.domain.lower() if lab.domain else None,
+                [snap.token_id(t) for t in split_tokens(lab.sub_domains)],
+                [snap.token_id(t) for t in split_tokens(lab.computing_resources)],
+                equipment_rank(lab.equipment_level), lab.total_researchers,
+                availability_code(lab.availability_status), lab.workload_score,
+            )
+            for lab in labs
+        )
+        return snap
+
+    @classmethod
+    def from_index(cls, rows, vocab: dict[int, str]) -> "LabSnapshot":
+        """
+        Build from already-normalized rows of
+        (id, name, email, domain, domain_key, sub_domain_ids, computing_ids,
+         equipment_rank, total_researchers, availability_code, workload_score)
+        whose token ids refer to `vocab`.
+        """
+        snap = cls(vocab)
+        snap._fill(rows)
+        return snap
+
+    def _fill(self, rows):
+        domain_codes: dict[str, int] = {}
+        domain_col, sub_ids, comp_ids = [], [], []
+        equipment, equipment_present, researchers = [], [], []
+        availability_col, workload, workload_present = [], [], []
+
+        for (lab_id, name, email, domain, domain_key, sub_tokens, comp_tokens,
+             rank, total_researchers, availability, workload_score) in rows:
+            self.lab_ids.append(lab_id)
+            self.names.append(name)
+            self.emails.append(email)
+            self.domains.append(domain)
+
+            if domain_key:
+                code = domain_codes.get(domain_key)
+                if code is None:
+                    code = domain_codes[domain_key] = len(self.domain_vocab)
+                    self.domain_vocab.append(domain_key)
+                domain_col.append(code)
+            else:
+                domain_col.append(-1)
+
+            sub_ids.append(sub_tokens)
+            comp_ids.append(comp_tokens)
+
+            equipment_present.append(rank is not None)
+            equipment.append(rank or 0)
+            researchers.append(total_researchers or 0)
+            availability_col.append(availability)
+            workload_present.append(workload_score is not None)
+            workload.append(workload_score if workload_score is not None else 0)
+
+        self.domain_codes = np.asarray(domain_col, dtype=np.int64)
+        # A non-empty column always yields at least one token
+        self.sub_domains = _TokenColumn(sub_ids, [bool(ids) for ids in sub_ids])
+        self.computing = _TokenColumn(comp_ids, [bool(ids) for ids in comp_ids])
+        self.equipment_level = np.asarray(equipment, dtype=np.int64)
+        self.equipment_present = np.asarray(equipment_present, dtype=bool)
+        self.total_researchers = np.asarray(researchers, dtype=np.int64)
+        self.availability = np.asarray(availability_col, dtype=np.int64)
+        self.workload = np.asarray(workload, dtype=np.int64)
+        self.workload_present = np.asarray(workload_present, dtype=bool)
+
+
+class ScoreBatch:
+    """
+    Result of scoring a whole snapshot in one pass.
+    `scores` holds the rounded totals; `result(row)` rebuilds the exact
+    dict returned by CollaborationAIService.calculate_collaboration_score.
+    """
+
+    def __init__(self, snapshot: LabSnapshot, ideal_comp: list[str], **components):
+        self.snapshot = snapshot
+        self._ideal_comp = ideal_comp
+        for name, value in components.items():
+            setattr(self, name, value)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def breakdown(self, row: int) -> dict:
+        snap = self.snapshot
+        breakdown = {}
+
+        relation = self.domain_relation[row]
+        if relation == DOMAIN_PERFECT:
+            breakdown["domain_match"] = "Perfect match"
+        elif relation == DOMAIN_PARTIAL:
+            breakdown["domain_match"] = "Partial match"
+        elif relation == DOMAIN_DIFFERENT:
+            breakdown["domain_match"] = "Different domains"
+
+        if self.has_subdomains[row]:
+            overlap = int(self.subdomain_overlap[row])
+            breakdown["subdomain_overlap"] = f"{overlap} common sub-domains" if overlap else "No overlap"
+
+        if self.has_equipment[row]:
+            diff = self.equipment_diff[row]
+            if diff == 0:
+                breakdown["equipment"] = "Similar equipment level"
+            elif diff == 1:
+                breakdown["equipment"] = "Compatible equipment"
+            else:
+                breakdown["equipment"] = "Different equipment levels"
+
+        if self.has_computing[row]:
+            if self.computing_overlap[row]:
+                # Rebuild both sets the same way the per-lab scorer does,
+                # so the joined string comes out in the same order.
+                ideal_comp = set(self._ideal_comp)
+                target_comp = set(snap.vocab[int(t)] for t in snap.computing.row_tokens(row))
+                breakdown["computing"] = f"Shared: {', '.join(ideal_comp.intersection(target_comp))}"
+            else:
+                breakdown["computing"] = "Different computing resources"
+
+        if self.has_team[row]:
+            breakdown["team_size"] = "Similar team sizes" if self.similar_team[row] else "Different team sizes"
+
+        availability = snap.availability[row]
+        if availability == AVAILABILITY_AVAILABLE:
+            breakdown["availability"] = "Currently available"
+        elif availability == AVAILABILITY_BUSY:
+            breakdown["availability"] = "Busy but open"
+        elif availability == AVAILABILITY_OTHER:
+            breakdown["availability"] = "Not available"
+
+        if snap.workload_present[row]:
+            workload = snap.workload[row]
+            if workload < 70:
+                breakdown["workload"] = "Low workload"
+            elif workload < 85:
+                breakdown["workload"] = "Medium workload"
+            else:
+                breakdown["workload"] = "High workload"
+
+        return breakdown
+
+    def result(self, row: int) -> dict:
+        score = float(self.scores[row])
+        return {
+            "score": round(score, 1),
+            "breakdown": self.breakdown(row),
+            "grade": grade_for(score),
+        }
+
+
+def select_top(scores: np.ndarray, k: int, min_score: float | None = None, offset: int = 0) -> list[int]:
+    """
+    Rows of the best `k` scores after skipping the first `offset` ranks,
+    best first. Uses a bounded heap (O(n log(k + offset))) instead of
+    sorting every lab; ties keep snapshot order like a stable sort would.
+    """
+    if k <= 0:
+        return []
+    candidates = np.arange(len(scores)) if min_score is None else np.flatnonzero(scores >= min_score)
+    best = heapq.nsmallest(offset + k, zip((-scores[candidates]).tolist(), candidates.tolist()))
+    return [row for _, row in best[offset:]]
+
+
+def count_at_least(scores: np.ndarray, min_score: float | None = None) -> int:
+    return len(scores) if min_score is None else int(np.count_nonzero(scores >= min_score))
+
+
+def grade_for(score: float) -> str:
+    """Convert score to letter grade"""
+    if score >= 80:
+        return "Excellent"
+    elif score >= 60:
+        return "Good"
+    elif score >= 40:
+        return "Fair"
+    else:
+        return "Poor"
+
+
+def score_snapshot(ideal_lab: IdealLab, snap: LabSnapshot) -> ScoreBatch:
+    """
+    Vectorized equivalent of calculate_collaboration_score applied to
+    every lab in the snapshot at once.
+    """
+    n = len(snap)
+
+    # 1. Domain Match (30 points max) - resolved once per distinct domain
+    domain_relation = np.full(n, DOMAIN_NONE, dtype=np.int64)
+    if ideal_lab.domain and n:
+        ideal_domain = ideal_lab.domain.lower()
+        relation_by_code = np.asarray(
+            [
+                DOMAIN_PERFECT if d == ideal_domain
+                else DOMAIN_PARTIAL if ideal_domain in d or d in ideal_domain
+                else DOMAIN_DIFFERENT
+                for d in snap.domain_vocab
+            ] + [DOMAIN_NONE],
+            dtype=np.int64,
+        )
+        # code -1 (no domain) picks the trailing DOMAIN_NONE entry
+        domain_relation = relation_by_code[snap.domain_codes]
+    domain_score = np.select(
+        [domain_relation == DOMAIN_PERFECT, domain_relation == DOMAIN_PARTIAL, domain_relation == DOMAIN_DIFFERENT],
+        [30, 20, 5],
+        default=0,
+    )
+
+    # 2. Sub-domain Overlap (20 points max)
+    ideal_subs = split_tokens(ideal_lab.sub_domains)
+    has_subdomains = snap.sub_domains.present & bool(ideal_lab.sub_domains)
+    subdomain_overlap = np.where(has_subdomains, snap.sub_domains.overlap_counts(snap.lookup_tokens(ideal_subs)), 0)
+    subdomain_score = np.minimum(20, subdomain_overlap * 7)
+
+    # 3. Resource Compatibility (20 points max)
+    has_equipment = snap.equipment_present & bool(ideal_lab.equipment_level)
+    ideal_level = equipment_rank(ideal_lab.equipment_level) or 0
+    equipment_diff = np.abs(snap.equipment_level - ideal_level)
+    equipment_score = np.where(has_equipment, np.select([equipment_diff == 0, equipment_diff == 1], [10, 5], 0), 0)
+
+    ideal_comp = split_tokens(ideal_lab.computing_resources)
+    has_computing = snap.computing.present & bool(ideal_lab.computing_resources)
+    computing_overlap = has_computing & (snap.computing.overlap_counts(snap.lookup_tokens(ideal_comp)) > 0)
+    computing_score = np.where(computing_overlap, 10, 0)
+
+    # 4. Team Size Compatibility (15 points max)
+    ideal_researchers = ideal_lab.total_researchers or 0
+    has_team = (snap.total_researchers > 0) & (ideal_researchers > 0)
+    larger = np.maximum(snap.total_researchers, ideal_researchers)
+    ratio = np.divide(
+        np.minimum(snap.total_researchers, ideal_researchers), larger,
+        out=np.zeros(n, dtype=np.float64), where=has_team,
+    )
+    similar_team = has_team & (ratio >= 0.5)
+    team_score = np.where(has_team, 10, 0) + np.where(similar_team, 5, 0)
+
+    # 5. Availability & Workload (15 points max)
+    availability_score = np.select(
+        [snap.availability == AVAILABILITY_AVAILABLE, snap.availability == AVAILABILITY_BUSY], [10, 5], 0
+    )
+    workload_score = np.where(
+        snap.workload_present,
+        np.select([snap.workload < 70, snap.workload < 85], [5, 2], 0),
+        0,
+    )
+
+    total = (
+        domain_score + subdomain_score + equipment_score + computing_score
+        + team_score + availability_score + workload_score
+    ).astype(np.float64)
+    scores = np.round(np.minimum(100.0, total), 1)
+
+    return ScoreBatch(
+        snap,
+        ideal_comp,
+        scores=scores,
+        domain_relation=domain_relation,
+        has_subdomains=has_subdomains,
+        subdomain_overlap=subdomain_overlap,
+        has_equipment=has_equipment,
+        equipment_diff=equipment_diff,
+        has_computing=has_computing,
+        computing_overlap=computing_overlap,
+        has_team=has_team,
+        similar_team=similar_team,
+    )
@@ -0,0 +1,151 @@
+# backend/app/services/lab_transfer.py
+
+import csv
+import io
+import json
+import os
+from typing import IO, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from .. import database, schemas
+from ..models import Lab
+from . import lab_features, score_table
+
+LAB_IMPORT_CHUNK_SIZE = int(os.getenv("LAB_IMPORT_CHUNK_SIZE", "1000"))
+LAB_EXPORT_CHUNK_SIZE = int(os.getenv("LAB_EXPORT_CHUNK_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# LabResponse field order: the LabCreate fields, then id and verified
+EXPORT_FIELDS = list(schemas.LabResponse.model_fields)
+
+
+def read_rows(stream: IO[bytes], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Lazily yield (line number, row dict, parse error) from a CSV (header row
+    required) or NDJSON byte stream. Blank CSV cells are dropped so
+    LabCreate defaults apply.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}, None
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def validate_row(row: dict) -> tuple[schemas.LabCreate | None, str | None]:
+    try:
+        lab = schemas.LabCreate(**row)
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+    # Same rule as POST /labs
+    if not lab.email or not lab.collaboration_interests:
+        return None, "Email and Collaboration Interests are required"
+    return lab, None
+
+
+def insert_chunk(db: Session, labs: list[schemas.LabCreate]) -> list[int]:
+    """
+    One executemany INSERT ... RETURNING id for the chunk, then the feature
+    index and score rows for the new labs, then one commit.
+    """
+    rows = [lab.dict() for lab in labs]
+    ids = list(db.scalars(insert(Lab).returning(Lab.id), rows))
+
+    inserted = db.query(Lab).filter(Lab.id.in_(ids)).options(selectinload(Lab.features)).all()
+    lab_features.index_labs(db, inserted)
+    score_table.refresh_lab_scores(db, inserted)
+    db.commit()
+    db.expunge_all()  # keep the identity map from growing across chunks
+    return ids
+
+
+def import_labs(db: Session, stream: IO[bytes], fmt: str, chunk_size: int = LAB_IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Stream rows from `stream`, validate each against LabCreate and insert the
+    valid ones chunk by chunk (each chunk is committed on its own, so a failure
+    keeps the chunks before it). Invalid rows are skipped and reported.
+    """
+    created = 0
+    rejected = 0
+    errors = []
+    chunk = []
+
+    for line_number, row, error in read_rows(stream, fmt):
+        lab = None
+        if error is None:
+            row.setdefault("data_source", "import")
+            lab, error = validate_row(row)
+        if error is not None:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": error})
+            continue
+        chunk.append(lab)
+        if len(chunk) >= chunk_size:
+            created += len(insert_chunk(db, chunk))
+            chunk = []
+
+    if chunk:
+        created += len(insert_chunk(db, chunk))
+
+    return {
+        "created": created,
+        "rejected": rejected,
+        "errors": errors,
+        "errors_truncated": rejected > len(errors),
+    }
+
+
+def export_labs(fmt: str, chunk_size: int = LAB_EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Generator for StreamingResponse: reads labs in id order with yield_per
+    (a server-side cursor where the driver has one) and emits one text
+    chunk per batch, so the table is never held in memory.
+    Owns its session, since it runs after the request's dependencies close.
+    """
+    db = database.SessionLocal()
+    try:
+        columns = [getattr(Lab, f) for f in EXPORT_FIELDS]
+        result = db.execute(
+            select(*columns).order_by(Lab.id).execution_options(yield_per=chunk_size)
+        )
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(EXPORT_FIELDS)
+
+        for partition in result.partitions():
+            for row in partition:
+                if fmt == "csv":
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
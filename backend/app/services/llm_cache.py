@@ -0,0 +1,128 @@
+# backend/app/services/llm_cache.py
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from ..cache import TTLCache
+from ..models import IdealLab, LLMResponse
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+# Also keep entries in the llm_response_cache table so they survive restarts
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+
+def normalize_task(task: str) -> str:
+    return " ".join(task.lower().split())
+
+
+def ideal_lab_fingerprint(ideal_lab: IdealLab) -> dict:
+    return {
+        c.name: getattr(ideal_lab, c.name)
+        for c in IdealLab.__table__.columns
+        if c.name not in ("id", "created_at")
+    }
+
+
+class LLMResponseCache:
+    """
+    Caches the model's per-lab recommendations ({lab_name: {...}}) keyed on
+    the normalized task, the IDEAL lab row and the top labs' ids/scores.
+    Entries are dropped when one of their labs changes.
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL, persist: bool = LLM_CACHE_PERSIST):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.persist = persist
+        self._keys_by_lab: dict[int, set[str]] = {}
+        self.persistent_hits = 0
+        self.invalidations = 0
+
+    def make_key(self, task: str, ideal_lab: IdealLab, top_labs: list[dict], model: str) -> str:
+        material = {
+            "model": model,
+            "task": normalize_task(task),
+            "ideal_lab": ideal_lab_fingerprint(ideal_lab),
+            "labs": [(lab["lab_id"], lab["score"]) for lab in top_labs],
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str, db: Session | None = None) -> dict | None:
+        payload = self.memory.get(key)
+        if payload is not None or not (self.persist and db is not None):
+            return payload
+
+        row = db.get(LLMResponse, key)
+        if row is None:
+            return None
+        created_at = row.created_at
+        if created_at is not None and created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at is not None and created_at < datetime.now(timezone.utc) - timedelta(seconds=self.memory.ttl):
+            db.delete(row)
+            db.commit()
+            return None
+
+        self.persistent_hits += 1
+        lab_ids = [int(i) for i in row.lab_ids.strip(",").split(",") if i]
+        self._remember(key, row.payload, lab_ids)
+        return row.payload
+
+    def set(self, key: str, payload: dict, lab_ids: list[int], db: Session | None = None):
+        self._remember(key, payload, lab_ids)
+        if self.persist and db is not None:
+            db.merge(LLMResponse(
+                key=key,
+                lab_ids="," + ",".join(str(i) for i in lab_ids) + ",",
+                payload=payload,
+                created_at=datetime.now(timezone.utc),
+            ))
+            db.commit()
+
+    def _remember(self, key: str, payload: dict, lab_ids: list[int]):
+        self.memory.set(key, payload)
+        for lab_id in lab_ids:
+            self._keys_by_lab.setdefault(lab_id, set()).add(key)
+        if len(self._keys_by_lab) > 4 * self.memory.maxsize:
+            self._prune_index()
+
+    def _prune_index(self):
+        """Forget expired/evicted keys so the lab -> keys index stays bounded."""
+        self._keys_by_lab = {
+            lab_id: live
+            for lab_id, keys in self._keys_by_lab.items()
+            if (live := {k for k in keys if k in self.memory})
+        }
+
+    def invalidate_lab(self, lab_id: int, db: Session | None = None):
+        """Drop every entry whose top labs include lab_id (caller commits)."""
+        for key in self._keys_by_lab.pop(lab_id, ()):
+            self.memory.pop(key)
+            self.invalidations += 1
+        if self.persist and db is not None:
+            db.query(LLMResponse).filter(
+                LLMResponse.lab_ids.like(f"%,{lab_id},%")
+            ).delete(synchronize_session=False)
+
+    def invalidate_all(self, db: Session | None = None):
+        """Drop everything, e.g. after the IDEAL lab changed (caller commits)."""
+        self.invalidations += len(self.memory)
+        self.memory.clear()
+        self._keys_by_lab.clear()
+        if self.persist and db is not None:
+            db.query(LLMResponse).delete(synchronize_session=False)
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "persistent": self.persist,
+            "persistent_hits": self.persistent_hits,
+            "invalidations": self.invalidations,
+        }
+
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,192 @@
+# backend/app/services/score_table.py
+
+import hashlib
+import json
+import threading
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .. import database
+from ..models import Lab, IdealLab, CollaborationScore
+from .lab_features import load_snapshot
+from .lab_scoring import LabSnapshot, score_snapshot
+
+# Only these IDEAL lab columns feed calculate_collaboration_score
+SCORED_IDEAL_FIELDS = ("domain", "sub_domains", "equipment_level", "computing_resources", "total_researchers")
+
+RECOMPUTE_CHUNK_SIZE = 1000
+
+
+def ideal_version(ideal_lab: IdealLab) -> str:
+    """Fingerprint of the scoring-relevant IDEAL lab fields; rows with another version are stale."""
+    material = json.dumps([getattr(ideal_lab, f) for f in SCORED_IDEAL_FIELDS], default=str)
+    return hashlib.sha1(material.encode()).hexdigest()[:16]
+
+
+def _store(db: Session, snapshot: LabSnapshot, ideal_lab: IdealLab):
+    batch = score_snapshot(ideal_lab, snapshot)
+    version = ideal_version(ideal_lab)
+    existing = {
+        row.lab_id: row
+        for row in db.query(CollaborationScore).filter(CollaborationScore.lab_id.in_(snapshot.lab_ids))
+    }
+    for i, lab_id in enumerate(snapshot.lab_ids):
+        result = batch.result(i)
+        row = existing.get(lab_id)
+        if row is None:
+            row = CollaborationScore(lab_id=lab_id)
+            db.add(row)
+        row.score = result["score"]
+        row.grade = result["grade"]
+        row.breakdown = result["breakdown"]
+        row.version = version
+
+
+def refresh_lab_scores(db: Session, labs: list[Lab], ideal_lab: IdealLab | None = None):
+    """Recompute the stored score of the given labs inside the caller's transaction."""
+    ideal_lab = ideal_lab or db.query(IdealLab).first()
+    if ideal_lab is None or not labs:
+        return
+    _store(db, LabSnapshot.from_labs(labs), ideal_lab)
+
+
+def recompute_all(db: Session, ideal_lab: IdealLab | None = None) -> int:
+    """Rebuild the whole score table from the feature index, committing per chunk."""
+    ideal_lab = ideal_lab or db.query(IdealLab).first()
+    if ideal_lab is None:
+        return 0
+    lab_ids = [lab_id for (lab_id,) in db.query(Lab.id).order_by(Lab.id)]
+    for start in range(0, len(lab_ids), RECOMPUTE_CHUNK_SIZE):
+        _store(db, load_snapshot(db, lab_ids[start:start + RECOMPUTE_CHUNK_SIZE]), ideal_lab)
+        db.commit()
+    return len(lab_ids)
+
+
+_recompute_lock = threading.Lock()
+_recompute_running = False
+_recompute_again = False
+
+
+def recompute_all_scores():
+    """
+    Background-task entry point: owns its session. One recompute runs at a
+    time per process; a call made while one is running returns at once and
+    has the running one go over the table again (the IDEAL lab may have
+    changed after it started).
+    """
+    global _recompute_running, _recompute_again
+    with _recompute_lock:
+        if _recompute_running:
+            _recompute_again = True
+            return
+        _recompute_running = True
+    try:
+        while True:
+            db = database.SessionLocal()
+            try:
+                recompute_all(db)
+            finally:
+                db.close()
+            with _recompute_lock:
+                if not _recompute_again:
+                    break
+                _recompute_again = False
+    finally:
+        with _recompute_lock:
+            _recompute_running = _recompute_again = False
+
+
+def schedule_recompute():
+    """Start recompute_all_scores on a background thread unless one is already running"""
+    with _recompute_lock:
+        if _recompute_running:
+            return
+    threading.Thread(target=recompute_all_scores, name="score-recompute", daemon=True).start()
+
+
+class ScoreTable:
+    """Current-version scores as arrays, ordered by lab id (the ranking tie-break)."""
+
+    def __init__(self, lab_ids: np.ndarray, scores: np.ndarray, unstored: dict[int, dict] | None = None):
+        self.lab_ids = lab_ids
+        self.scores = scores
+        # Results for labs with no stored row yet, scored in memory by load_scores
+        self.unstored = unstored or {}
+
+    def scored_labs(self, db: Session, rows: list[int]) -> list[dict]:
+        """Full scored-lab dicts for the selected rows, in the given order"""
+        wanted = [int(self.lab_ids[r]) for r in rows]
+        if not wanted:
+            return []
+        by_id = {
+            lab_id: (name, email, domain, score, grade, breakdown)
+            for lab_id, name, email, domain, score, grade, breakdown in (
+                db.query(
+                    Lab.id, Lab.name, Lab.email, Lab.domain,
+                    CollaborationScore.score, CollaborationScore.grade, CollaborationScore.breakdown,
+                )
+                .outerjoin(CollaborationScore, CollaborationScore.lab_id == Lab.id)
+                .filter(Lab.id.in_(wanted))
+            )
+        }
+        scored = []
+        for lab_id in wanted:
+            if lab_id not in by_id:
+                continue  # deleted since the scores were read
+            name, email, domain, score, grade, breakdown = by_id[lab_id]
+            if lab_id in self.unstored:
+                result = self.unstored[lab_id]
+                score, grade, breakdown = result["score"], result["grade"], result["breakdown"]
+            scored.append({
+                "lab_id": lab_id,
+                "lab_name": name,
+                "lab_email": email,
+                "domain": domain,
+                "score": score,
+                "grade": grade,
+                "score_breakdown": breakdown
+            })
+        return scored
+
+
+def load_scores(db: Session, ideal_lab: IdealLab) -> ScoreTable:
+    """
+    Read the materialized scores; never writes. Rows scored against an older
+    IDEAL lab are served as they are while the recompute catches up, and labs
+    with no row yet are scored in memory. Either case starts the background
+    recompute if it isn't already running.
+    """
+    version = ideal_version(ideal_lab)
+    rows = (
+        db.query(CollaborationScore.lab_id, CollaborationScore.score, CollaborationScore.version)
+        .join(Lab, Lab.id == CollaborationScore.lab_id)  # skip rows left behind by deleted labs
+        .order_by(CollaborationScore.lab_id)
+        .all()
+    )
+    missing_ids = [
+        lab_id for (lab_id,) in (
+            db.query(Lab.id)
+            .outerjoin(CollaborationScore, CollaborationScore.lab_id == Lab.id)
+            .filter(CollaborationScore.lab_id.is_(None))
+            .order_by(Lab.id)
+        )
+    ]
+
+    unstored = {}
+    for start in range(0, len(missing_ids), RECOMPUTE_CHUNK_SIZE):
+        snapshot = load_snapshot(db, missing_ids[start:start + RECOMPUTE_CHUNK_SIZE])
+        batch = score_snapshot(ideal_lab, snapshot)
+        for i, lab_id in enumerate(snapshot.lab_ids):
+            unstored[int(lab_id)] = batch.result(i)
+    if unstored or any(row_version != version for _, _, row_version in rows):
+        schedule_recompute()
+
+    scores = {lab_id: score for lab_id, score, _ in rows}
+    scores.update((lab_id, result["score"]) for lab_id, result in unstored.items())
+    lab_ids = sorted(scores)
+    return ScoreTable(
+        np.fromiter(lab_ids, dtype=np.int64, count=len(lab_ids)),
+        np.fromiter((scores[lab_id] for lab_id in lab_ids), dtype=np.float64, count=len(lab_ids)),
+        unstored,
+    )
@@ -0,0 +1,113 @@
+"""
+Login throughput benchmark for bcrypt password verification.
+
+In-process (default): a burst of concurrent verifications, first inline on
+the event loop (the old behaviour), then on auth.PasswordHasher with 1, 2,
+4, ... workers up to the core count. Reports logins/s and the worst event
+loop stall, which is what other requests would feel during the burst.
+
+Against a running server: concurrent POST /users/login for one test user
+(registered first if needed).
+
+    python -m backend.bench_auth [--logins 64] [--rounds 12]
+    python -m backend.bench_auth --url http://localhost:8001 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+async def _loop_stall(stop: asyncio.Event) -> float:
+    """Longest gap between 1 ms ticks while the burst runs"""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        worst = max(worst, now - last - 0.001)
+        last = now
+    return worst
+
+
+async def _burst(verify, hashed: str, logins: int) -> tuple[float, float]:
+    stop = asyncio.Event()
+    stall = asyncio.create_task(_loop_stall(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify("correct horse", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    assert all(results)
+    return elapsed, await stall
+
+
+async def bench_in_process(logins: int):
+    from .app import auth
+
+    hashed = auth.get_password_hash("correct horse")
+    cores = os.cpu_count() or 1
+    print(f"{logins} concurrent logins, bcrypt rounds={auth.BCRYPT_ROUNDS}, {cores} core(s)")
+    print(f"{'mode':<12}{'logins/s':>10}{'total s':>10}{'max loop stall ms':>20}")
+
+    async def inline(plain, hashed_password):
+        return auth.verify_password(plain, hashed_password)
+
+    elapsed, stall = await _burst(inline, hashed, logins)
+    print(f"{'inline':<12}{logins / elapsed:>10.1f}{elapsed:>10.2f}{stall * 1000:>20.1f}")
+
+    workers = 1
+    while True:
+        hasher = auth.PasswordHasher(workers=workers, max_pending=logins)
+        elapsed, stall = await _burst(hasher.verify, hashed, logins)
+        stats = hasher.stats()
+        hasher.shutdown()
+        print(f"{f'pool x{workers}':<12}{logins / elapsed:>10.1f}{elapsed:>10.2f}{stall * 1000:>20.1f}"
+              f"   (avg wait {stats['avg_wait_ms']} ms, run {stats['avg_run_ms']} ms)")
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+
+async def bench_server(url: str, logins: int, concurrency: int):
+    import httpx
+
+    credentials = {"name": "Bench User", "email": "bench-login@example.com", "password": "correct horse"}
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        await client.post("/users/register", json=credentials)  # 400 if it already exists
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses = {}
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/users/login", json=credentials)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        stats = (await client.get("/users/auth/stats")).json()
+
+    print(f"{logins} logins, concurrency {concurrency}: {logins / elapsed:.1f} logins/s ({elapsed:.2f}s)")
+    print(f"status codes: {statuses}")
+    print(f"server password pool: {stats['password_pool']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, help="bcrypt cost factor for the in-process run (BCRYPT_ROUNDS)")
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_server(args.url.rstrip("/"), args.logins, args.concurrency))
+        return
+    if args.rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)  # read when app.auth is imported
+    asyncio.run(bench_in_process(args.logins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Concurrent read/write benchmark for the SQLite connection settings.
+
+Runs the same mixed workload -- reader threads paging labs by domain (the
+GET /labs query) while writer threads update lab rows, one commit each --
+against a fresh SQLite file twice: once as the engine used to be set up
+(rollback journal, synchronous=FULL, pysqlite's 5 s lock wait) and once
+with database.py's tuned settings (WAL, synchronous=NORMAL, mmap_size,
+busy_timeout).
+Reports reads/s, writes/s, p95 latencies and "database is locked" errors.
+
+    python -m backend.bench_db [--labs 5000] [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from .app import crud, database
+from .app.models import Lab
+
+DOMAINS = ["Robotics", "Bioinformatics", "Cybersecurity", "Materials Science", "Climate Modeling"]
+
+
+def _make_engine(path: str, tuned: bool):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **database.engine_options(url))
+    return database.tune_engine(engine) if tuned else engine
+
+
+def _seed(engine, labs: int):
+    database.Base.metadata.create_all(bind=engine)
+    rows = [
+        {
+            "name": f"Lab {i}",
+            "domain": DOMAINS[i % len(DOMAINS)],
+            "email": f"lab{i}@example.com",
+            "country": "Pakistan",
+            "collaboration_interests": "AI",
+        }
+        for i in range(labs)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Lab), rows)
+
+
+def _p95(latencies: list[float]) -> float:
+    if not latencies:
+        return 0.0
+    latencies.sort()
+    return latencies[int(0.95 * (len(latencies) - 1))] * 1000
+
+
+def run(tuned: bool, labs: int, readers: int, writers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _make_engine(os.path.join(tmp, "bench.db"), tuned)
+        _seed(engine, labs)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        stop = threading.Event()
+        lock = threading.Lock()
+        read_latencies, write_latencies = [], []
+        errors = {"read": 0, "write": 0}
+
+        def reader():
+            rng = random.Random()
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with Session() as db:
+                        last_id = rng.randrange(0, labs)
+                        db.execute(crud.labs_query(domain=rng.choice(DOMAINS), after=(last_id, last_id), limit=50)).all()
+                except OperationalError:
+                    with lock:
+                        errors["read"] += 1
+                    continue
+                with lock:
+                    read_latencies.append(time.perf_counter() - started)
+
+        def writer():
+            rng = random.Random()
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with Session() as db:
+                        db.execute(
+                            update(Lab).where(Lab.id == rng.randrange(1, labs + 1)).values(active_projects=rng.randrange(0, 20))
+                        )
+                        db.commit()
+                except OperationalError:
+                    with lock:
+                        errors["write"] += 1
+                    continue
+                with lock:
+                    write_latencies.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {
+        "reads/s": len(read_latencies) / seconds,
+        "writes/s": len(write_latencies) / seconds,
+        "read p95 ms": _p95(read_latencies),
+        "write p95 ms": _p95(write_latencies),
+        "locked errors": errors["read"] + errors["write"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labs", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.labs} labs, {args.readers} readers, {args.writers} writers, {args.seconds:g}s per run, "
+          f"pool {database.DB_POOL_SIZE}+{database.DB_MAX_OVERFLOW}")
+    columns = ["reads/s", "writes/s", "read p95 ms", "write p95 ms", "locked errors"]
+    print(f"{'mode':<10}" + "".join(f"{c:>15}" for c in columns))
+    for name, tuned in (("default", False), ("tuned", True)):
+        result = run(tuned, args.labs, args.readers, args.writers, args.seconds)
+        print(f"{name:<10}" + "".join(f"{result[c]:>15.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Field-extraction benchmark for document ingestion.
+
+Compares the original per-field extraction (patterns rebuilt on every call,
+domains and role counts recomputed per field) with doc_ingest.extract_lab_fields,
+over the sample documents in `other labs/`, and checks both give the same fields.
+
+    python -m backend.bench_ingest [--repeat 200] [--scale 1]
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+from .app.routers import doc_ingest as ingest
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "other labs")
+
+
+# ----------------
+# Original per-call extraction
+# ----------------
+
+def _integer(text_lower, keywords):
+    for k in keywords:
+        match = re.search(rf"{k}\D*(\d+)", text_lower) or re.search(rf"(\d+)\D*{k}", text_lower)
+        if match:
+            return int(match.group(1))
+    return 0
+
+
+def _level(text_lower, keyword):
+    match = re.search(rf"{keyword}.*?(high|medium|low)", text_lower)
+    return match.group(1) if match else None
+
+
+def _count(pattern, text):
+    match = re.search(pattern, text, re.IGNORECASE)
+    return int(match.group(1)) if match else 0
+
+
+def _roles(text):
+    return (
+        _count(r"(\d+)\s+senior\s+researchers", text),
+        _count(r"(\d+)\s+(PhD|Ph\.D|phd)\s+(scholars|students)", text),
+        _count(r"(\d+)\s+(research\s+)?interns", text),
+    )
+
+
+def _field(text, field_name):
+    match = re.search(rf"{field_name}\s*[:\-]\s*(.+)", text, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    if field_name == "country":
+        match = re.search(r"\b(usa|uk|canada|germany|france|india|pakistan)\b", text.lower())
+        return match.group(1).upper() if match else None
+    if field_name == "city":
+        match = re.search(r"in\s+([A-Z][a-zA-Z\s]+),\s*(USA|UK|Canada|Pakistan)", text)
+        return match.group(1).strip() if match else None
+    match = re.search(r"(at|under)\s+(the\s+)?([A-Z][a-zA-Z\s]+University)", text)
+    return match.group(3).strip() if match else None
+
+
+def _domains(text_lower):
+    found = [d for d in ingest.domain_keywords() if d.lower() in text_lower]
+    return ", ".join(found) if found else None
+
+
+def per_call_fields(text: str) -> dict:
+    text_lower = text.lower()
+    total = re.search(r"(\d+)\s+researchers\s+in\s+total", text, re.IGNORECASE)
+    total = int(total.group(1)) if total else sum(_roles(text))
+    senior, phd, interns = _roles(text)
+    lab_type = re.search(r"(research laboratory|laboratory|lab|institute)", text_lower)
+    email = re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", text)
+    website = re.search(r"https?://[^\s\)\]\}]+", text)
+    preferred = "preferred domains" in text_lower or "open to collaboration" in text_lower
+    return {
+        "name": ingest.extract_lab_name(text),
+        "description": ingest.extract_description(text),
+        "lab_type": lab_type.group(0).title() if lab_type else None,
+        "domain": next((d for d in ingest.domain_keywords() if d.lower() in text_lower), None),
+        "sub_domains": _domains(text_lower),
+        "preferred_domains": _domains(text_lower) if preferred else None,
+        "total_researchers": total,
+        "senior_researchers": senior,
+        "phd_students": phd,
+        "interns": interns,
+        "active_projects": _integer(text_lower, ingest.ACTIVE_PROJECT_KEYWORDS),
+        "max_project_capacity": _integer(text_lower, ingest.PROJECT_CAPACITY_KEYWORDS),
+        "workload_score": _integer(text_lower, ingest.WORKLOAD_KEYWORDS),
+        "availability_status": ingest.extract_availability(text_lower),
+        "equipment_level": _level(text_lower, "equipment"),
+        "funding_level": _level(text_lower, "funding"),
+        "computing_resources": ingest.extract_computing(text_lower),
+        "collaboration_interests": ingest.extract_collaboration(text_lower),
+        "email": email.group(0) if email else None,
+        "website": website.group(0).rstrip(".") if website else None,
+        "country": _field(text, "country"),
+        "city": _field(text, "city"),
+        "institute": _field(text, "institute"),
+        "data_source": "document"
+    }
+
+
+# ----------------
+# Benchmark
+# ----------------
+
+def load_samples(scale: int) -> list[str]:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(SAMPLES_DIR, "*"))):
+        try:
+            texts.append(ingest.extract_text(path, path))
+        except Exception as e:
+            print(f"skipping {os.path.basename(path)}: {e}")
+    # Longer documents make the per-call regex costs easier to see
+    return ["\n\n".join([text] * scale) for text in texts]
+
+
+def timed(extract, texts, repeat) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            extract(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=1, help="repeat each document's text this many times")
+    args = parser.parse_args()
+
+    texts = load_samples(args.scale)
+    if not texts:
+        print(f"No sample documents found in {SAMPLES_DIR}")
+        return
+
+    mismatched = [i for i, t in enumerate(texts) if per_call_fields(t) != ingest.extract_lab_fields(t)]
+    if mismatched:
+        print(f"WARNING: outputs differ for {len(mismatched)} document(s)")
+
+    docs = len(texts) * args.repeat
+    baseline = timed(per_call_fields, texts, args.repeat)
+    engine = timed(ingest.extract_lab_fields, texts, args.repeat)
+    print(f"{docs} documents, {sum(map(len, texts)) // len(texts)} chars on average")
+    print(f"per-call  : {baseline:.3f}s  ({docs / baseline:,.0f} docs/s)")
+    print(f"engine    : {engine:.3f}s  ({docs / engine:,.0f} docs/s)")
+    print(f"speedup   : {baseline / engine:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
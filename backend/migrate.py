@@ -0,0 +1,26 @@
+# migrate.py
+
+import argparse
+
+from app.database import engine
+from app.migrations import LATEST_VERSION, MIGRATIONS, current_version, run_migrations
+
+
+def migrate(status_only: bool = False):
+    version = current_version(engine)
+    print(f"Schema version: {version} (latest: {LATEST_VERSION})")
+    if status_only:
+        for number, name, _ in MIGRATIONS:
+            print(f"  [{'x' if number <= version else ' '}] {number}: {name}")
+        return
+    applied = run_migrations(engine)
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("Nothing to migrate.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="only show which migrations are applied")
+    migrate(parser.parse_args().status)
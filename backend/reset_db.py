@@ -2,12 +2,13 @@
 
 from app.database import Base, engine
 from app.models import Lab, Researcher, User  # import all models
+from app.migrations import run_migrations
 
 def reset_database():
     print("Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
     print("Creating all tables...")
-    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     print("Database reset complete!")
 
 
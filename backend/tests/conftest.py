@@ -0,0 +1,43 @@
+"""
+Run from the repository root:  python -m pytest backend/tests
+
+The app reads its settings at import, so point it at a throwaway SQLite
+database before anything from backend.app is imported.
+"""
+import os
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="lab-records-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+
+@pytest.fixture
+def db():
+    """A session on the test database, with the schema migrated and emptied afterwards"""
+    from backend.app import database
+    from backend.app.migrations import run_migrations
+
+    run_migrations(database.engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with database.engine.begin() as conn:
+            for table in reversed(database.Base.metadata.sorted_tables):
+                if table.name != "schema_version":
+                    conn.execute(table.delete())
+
+
+@pytest.fixture(autouse=True)
+def no_background_recompute(monkeypatch):
+    """Reads schedule a score recompute thread; keep it from writing across tests"""
+    from backend.app.services import score_table
+
+    monkeypatch.setattr(score_table, "schedule_recompute", lambda: None)
@@ -0,0 +1,18 @@
+import pytest
+
+from backend.app.routers.collaboration import parse_template, render_template
+
+CONTEXT = {"lab_name": "Vision Lab", "score": 81.5}
+
+
+def test_plain_placeholders_and_literal_braces():
+    pieces = parse_template("Hi {lab_name} ({score}) {{not a placeholder}} {unknown}")
+    assert render_template(pieces, CONTEXT) == "Hi Vision Lab (81.5) {not a placeholder} {unknown}"
+
+
+@pytest.mark.parametrize("template", [
+    "{", "}", "{}", "{0}", "{lab_name.__class__}", "{lab_name[0]}", "{lab_name!r}", "{score:.1f}",
+])
+def test_rejects_anything_but_plain_names(template):
+    with pytest.raises(ValueError):
+        parse_template(template)
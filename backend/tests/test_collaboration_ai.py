@@ -0,0 +1,172 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app import models
+from backend.app.services.lab_features import backfill_features
+from backend.app.services.collaboration_ai import CollaborationAIService
+from backend.app.services.llm_cache import LLMResponseCache
+
+
+class FakeStream:
+    def __init__(self, pieces: list[str], fail_after: int | None = None):
+        self.pieces = pieces
+        self.fail_after = fail_after
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for i, piece in enumerate(self.pieces):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise RuntimeError("connection reset")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Just enough of AsyncOpenAI: chat.completions.create, streaming or not"""
+
+    def __init__(self, content: str, fail_after: int | None = None):
+        self.content = content
+        self.fail_after = fail_after
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        if stream:
+            pieces = [self.content[i:i + 7] for i in range(0, len(self.content), 7)]
+            self.streams.append(FakeStream(pieces, self.fail_after))
+            return self.streams[-1]
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class SlowClient(FakeClient):
+    """A FakeClient whose completions take `delay` seconds; tracks how many overlap"""
+
+    def __init__(self, content: str, delay: float):
+        super().__init__(content)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return await super().create(model, messages, stream=stream, **kwargs)
+
+
+def recommendation(name: str) -> dict:
+    return {"lab_name": name, "reason": f"because {name}", "recommended_projects": ["p1"]}
+
+
+@pytest.fixture
+def labs(db):
+    db.add(models.IdealLab(name="IDEAL", domain="Robotics", sub_domains="ML"))
+    db.add_all(
+        models.Lab(name=f"Lab {i}", domain="Robotics", email=f"lab{i}@example.edu", collaboration_interests="AI")
+        for i in range(3)
+    )
+    db.commit()
+    backfill_features(db)  # what the lab write paths do
+    return ["Lab 0", "Lab 1", "Lab 2"]
+
+
+def service(content: str, **kwargs) -> CollaborationAIService:
+    return CollaborationAIService(client=FakeClient(content, **kwargs), cache=LLMResponseCache(persist=False))
+
+
+def collect(agen) -> list[dict]:
+    async def run():
+        return [message async for message in agen]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("content", [
+    "{}",
+    json.dumps({"recommendations": [recommendation("Some other lab")]}),
+    json.dumps({"recommendations": [recommendation("Lab 0")]}),
+])
+def test_incomplete_answers_are_not_cached(db, labs, content):
+    ai = service(content)
+    result = asyncio.run(ai.generate_suggestions(db, "find partners"))
+    assert result["cached"] is False
+    assert len(ai.cache.memory) == 0
+
+
+def test_complete_answers_are_cached(db, labs):
+    ai = service(json.dumps({"recommendations": [recommendation(name) for name in labs]}))
+    assert asyncio.run(ai.generate_suggestions(db, "find partners"))["cached"] is False
+    assert asyncio.run(ai.generate_suggestions(db, "find partners"))["cached"] is True
+
+
+def test_unparsed_stream_is_not_cached(db, labs):
+    ai = service("I'm sorry, I can't help with that.")
+    messages = collect(ai.stream_suggestions(db, "find partners"))
+    assert messages[-1]["type"] == "result"
+    assert len(ai.cache.memory) == 0
+
+
+def test_complete_stream_is_cached(db, labs):
+    ai = service("\n".join(json.dumps(recommendation(name)) for name in labs))
+    collect(ai.stream_suggestions(db, "find partners"))
+    assert len(ai.cache.memory) == 1
+
+
+def test_stream_error_is_reported_and_stream_closed(db, labs):
+    ai = service("\n".join(json.dumps(recommendation(name)) for name in labs), fail_after=3)
+    messages = collect(ai.stream_suggestions(db, "find partners"))
+    assert messages[-1] == {"type": "error", "message": "Unexpected error: connection reset"}
+    assert ai.client.streams[0].closed
+
+
+def test_stream_closed_when_client_goes_away(db, labs):
+    ai = service("\n".join(json.dumps(recommendation(name)) for name in labs))
+
+    async def first_token():
+        messages = ai.stream_suggestions(db, "find partners")
+        async for message in messages:
+            if message["type"] == "token":
+                break
+        await messages.aclose()  # what the WebSocket handler does when a send fails
+
+    asyncio.run(first_token())
+    assert ai.client.streams[0].closed
+    assert not ai._llm_slots.locked()
+
+
+def test_slow_completion_times_out(db, labs):
+    client = SlowClient(json.dumps({"recommendations": []}), delay=5)
+    ai = CollaborationAIService(client=client, timeout=0.05, cache=LLMResponseCache(persist=False))
+
+    assert asyncio.run(ai.generate_suggestions(db, "find partners")) == {"error": "OpenAI request timed out after 0.05s"}
+    messages = collect(ai.stream_suggestions(db, "find partners"))
+    assert messages[-1] == {"type": "error", "message": "OpenAI request timed out after 0.05s"}
+    assert client.cancelled == 2
+    assert not ai._llm_slots.locked()
+
+
+def test_concurrent_completions_are_capped(db, labs):
+    client = SlowClient(json.dumps({"recommendations": [recommendation(name) for name in labs]}), delay=0.05)
+    ai = CollaborationAIService(client=client, max_concurrency=2, cache=LLMResponseCache(persist=False))
+
+    async def run():
+        return await asyncio.gather(*(ai.generate_suggestions(db, f"task {i}") for i in range(6)))
+
+    results = asyncio.run(run())
+    assert all(len(result["recommendations"]) == 3 for result in results)
+    assert client.max_in_flight == 2
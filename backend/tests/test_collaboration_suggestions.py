@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.app import models
+from backend.app.database import async_engine
+from backend.app.main import app
+from backend.app.routers.collaboration import IDEAL_LABS
+
+
+def add_labs(db, count: int, start: int = 0):
+    for i in range(start, start + count):
+        lab = models.Lab(name=f"Lab {i}", domain=IDEAL_LABS["domain"], email=f"lab{i}@example.edu",
+                         collaboration_interests="AI")
+        lab.researchers = [
+            models.Researcher(name=f"R{i}-{j}", field=f"Field {j}") for j in range(3)
+        ]
+        db.add(lab)
+    db.add(models.Lab(name=f"Other {start}", domain="Chemistry", email=f"other{start}@example.edu",
+                      collaboration_interests="AI"))
+    db.commit()
+
+
+def suggestions_statements(client) -> tuple[list, int]:
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        response = client.get("/collaboration/suggestions")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    return response.json(), len(statements)
+
+
+def test_suggestions_query_count_is_constant(db):
+    with TestClient(app) as client:
+        add_labs(db, 2)
+        few, few_statements = suggestions_statements(client)
+        add_labs(db, 40, start=2)
+        many, many_statements = suggestions_statements(client)
+
+    assert len(few) == 2
+    assert len(many) == 42
+    assert many[0]["shared_fields"] == ["Field 0", "Field 1", "Field 2"]
+    assert few_statements == many_statements == 1
@@ -0,0 +1,20 @@
+import pytest
+
+from backend.app.routers.collaboration_ai import _number
+from backend.app.services.collaboration_ai import MAX_TOP_K, TOP_K
+
+
+def test_defaults_and_explicit_zero():
+    assert _number({}, "top_k", TOP_K, 1, MAX_TOP_K) == TOP_K
+    assert _number({"min_score": 0}, "min_score", 40, 0, 100) == 0
+
+
+@pytest.mark.parametrize("value, expected", [(10_000, MAX_TOP_K), (0, 1), (-3, 1), ("7", 7), (3.9, 3.9)])
+def test_clamped(value, expected):
+    assert _number({"top_k": value}, "top_k", TOP_K, 1, MAX_TOP_K) == expected
+
+
+@pytest.mark.parametrize("value", ["lots", [], {}, True, float("nan"), "inf"])
+def test_rejects_non_numbers(value):
+    with pytest.raises(ValueError, match="top_k must be a number"):
+        _number({"top_k": value}, "top_k", TOP_K, 1, MAX_TOP_K)
@@ -0,0 +1,102 @@
+import os
+
+import pdfplumber
+import pytest
+
+from backend.app.routers import doc_ingest
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "other labs")
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(path, pages: list[list[str]]):
+    """A minimal PDF: one Helvetica text line per entry, one page per list"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+    return str(path)
+
+
+def read_pages(path) -> str:
+    """Reference text: every page, read independently of extract_pdf_text"""
+    with pdfplumber.open(path) as pdf:
+        return "".join(text + "\n" for page in pdf.pages if (text := page.extract_text()))
+
+
+FIRST_PAGE = [
+    "Applied Vision Laboratory",
+    "Contact: vision.lab@example.edu, https://vision.example.edu",
+    "18 researchers in total. Workload score 6. The lab is available.",
+    "Equipment level high, funding level medium.",
+    "Country: Pakistan",
+    "Institute: National University",
+]
+LATER_PAGES = [
+    ["We have 5 senior researchers and 8 PhD scholars, plus 4 research interns."],
+    ["Managing 3 ongoing projects with capacity to handle 12 projects."],
+    ["Open to collaboration in Robotics and Bioinformatics; GPU servers and an HPC cluster."],
+    ["Located in Lahore, Pakistan."],
+]
+
+
+def test_pdf_fields_match_full_document(tmp_path):
+    # Page 1 has email, website, counts, levels, country and institute, but
+    # the other fields only appear on later pages
+    path = make_pdf(tmp_path / "lab.pdf", [FIRST_PAGE, *LATER_PAGES])
+    text = doc_ingest.extract_pdf_text(path)
+    assert text == read_pages(path)
+
+    fields = doc_ingest.extract_lab_fields(text)
+    assert fields["senior_researchers"] == 5
+    assert fields["phd_students"] == 8
+    assert fields["interns"] == 4
+    assert fields["active_projects"]
+    assert fields["max_project_capacity"] == 12
+    assert fields["sub_domains"] == "Robotics, Bioinformatics"
+    assert fields["computing_resources"] == "GPU, HPC"
+    assert fields["collaboration_interests"] == "Open to collaboration"
+    assert fields["city"] == "Lahore"
+
+
+def test_pdf_reads_every_page_by_default(tmp_path):
+    filler = [[f"Annual report, appendix {i}."] for i in range(150)]
+    path = make_pdf(tmp_path / "long.pdf", [FIRST_PAGE, *filler, LATER_PAGES[-1]])
+    text = doc_ingest.extract_pdf_text(path)
+    assert text == read_pages(path)
+    assert doc_ingest.extract_field(text, "city") == "Lahore"
+
+
+def test_pdf_page_cap(tmp_path):
+    path = make_pdf(tmp_path / "capped.pdf", [FIRST_PAGE, *LATER_PAGES])
+    text = doc_ingest.extract_pdf_text(path, max_pages=1)
+    assert "senior researchers" not in text
+    assert doc_ingest.extract_email(text) == "vision.lab@example.edu"
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(SAMPLES_DIR, "lab1.pdf")), reason="sample PDF not present")
+def test_sample_pdf_matches_full_document():
+    path = os.path.join(SAMPLES_DIR, "lab1.pdf")
+    assert doc_ingest.extract_pdf_text(path) == read_pages(path)
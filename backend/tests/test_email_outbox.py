@@ -0,0 +1,188 @@
+import functools
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi.testclient import TestClient
+
+from backend.app import models
+from backend.app.email import SMTPConnection
+from backend.app.services import email_outbox
+from backend.app.services.email_outbox import OutboxWorker, new_message
+
+
+class Recorder:
+    """aiosmtpd handler: keeps every delivered message and the session it came on"""
+
+    def __init__(self):
+        self.delivered = []
+        self.reply = "250 Message accepted for delivery"
+
+    async def handle_DATA(self, server, session, envelope):
+        if not self.reply.startswith("250"):
+            return self.reply
+        self.delivered.append((session, envelope.rcpt_tos[0]))
+        return self.reply
+
+    def sessions(self):
+        sessions = []
+        for session, _ in self.delivered:
+            if not any(session is seen for seen in sessions):
+                sessions.append(session)
+        return sessions
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = Recorder()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(
+        email_outbox, "SMTPConnection",
+        functools.partial(SMTPConnection, smtp_server="127.0.0.1", port=port, starttls=False)
+    )
+    try:
+        yield handler
+    finally:
+        controller.stop()
+
+
+def queue(db, count):
+    messages = [new_message(f"lab{i}@example.edu", f"Subject {i}", "Hello") for i in range(count)]
+    db.add_all(messages)
+    db.commit()
+    return [message.id for message in messages]
+
+
+def statuses(db):
+    db.expire_all()
+    return [row.status for row in db.query(models.EmailOutbox).order_by(models.EmailOutbox.id)]
+
+
+def as_utc(value):
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def test_batch_goes_over_one_smtp_session(db, smtp):
+    queue(db, 10)
+    worker = OutboxWorker(batch_size=50)
+    try:
+        assert worker.send_due_batch() == 10
+    finally:
+        worker._close_connection()
+
+    assert [to for _, to in smtp.delivered] == [f"lab{i}@example.edu" for i in range(10)]
+    assert len(smtp.sessions()) == 1
+    assert statuses(db) == ["sent"] * 10
+
+
+def test_failed_send_is_retried_with_backoff(db, smtp, monkeypatch):
+    monkeypatch.setattr(email_outbox, "OUTBOX_BACKOFF_SECONDS", 60)
+    [message_id] = queue(db, 1)
+    worker = OutboxWorker()
+    try:
+        smtp.reply = "451 Try again later"
+        before = datetime.now(timezone.utc)
+        assert worker.send_due_batch() == 1
+
+        message = db.get(models.EmailOutbox, message_id)
+        assert (message.status, message.attempts) == ("queued", 1)
+        assert "451" in message.last_error
+        assert as_utc(message.next_attempt_at) >= before + timedelta(seconds=60)
+        assert worker.send_due_batch() == 0  # not due yet
+
+        message.next_attempt_at = before
+        db.commit()
+        smtp.reply = "250 Message accepted for delivery"
+        assert worker.send_due_batch() == 1
+    finally:
+        worker._close_connection()
+
+    db.expire_all()
+    message = db.get(models.EmailOutbox, message_id)
+    assert (message.status, message.attempts, message.last_error) == ("sent", 2, None)
+    assert len(smtp.delivered) == 1
+
+
+def test_gives_up_after_max_attempts(db, smtp, monkeypatch):
+    monkeypatch.setattr(email_outbox, "OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(email_outbox, "OUTBOX_BACKOFF_SECONDS", 0)
+    [message_id] = queue(db, 1)
+    smtp.reply = "554 Transaction failed"
+    worker = OutboxWorker()
+    try:
+        assert [worker.send_due_batch() for _ in range(4)] == [1, 1, 1, 0]
+    finally:
+        worker._close_connection()
+
+    message = db.get(models.EmailOutbox, message_id)
+    assert (message.status, message.attempts) == ("failed", 3)
+    assert smtp.delivered == []
+
+
+def test_concurrent_workers_send_each_row_once(db, smtp):
+    queue(db, 20)
+    workers = [OutboxWorker(batch_size=50) for _ in range(3)]
+    start = threading.Barrier(len(workers))
+
+    def drain(worker):
+        start.wait()
+        worker.send_due_batch()
+
+    threads = [threading.Thread(target=drain, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for worker in workers:
+        worker._close_connection()
+
+    assert sorted(to for _, to in smtp.delivered) == sorted(f"lab{i}@example.edu" for i in range(20))
+    assert statuses(db) == ["sent"] * 20
+
+
+def test_expired_claims_are_requeued(db, smtp):
+    stuck, claimed = queue(db, 2)
+    now = datetime.now(timezone.utc)
+    db.get(models.EmailOutbox, stuck).status = "sending"
+    db.get(models.EmailOutbox, stuck).next_attempt_at = now - timedelta(seconds=1)
+    db.get(models.EmailOutbox, claimed).status = "sending"
+    db.get(models.EmailOutbox, claimed).next_attempt_at = now + timedelta(minutes=5)
+    db.commit()
+
+    worker = OutboxWorker()
+    try:
+        assert worker.send_due_batch() == 1
+    finally:
+        worker._close_connection()
+
+    assert statuses(db) == ["sent", "sending"]
+    assert [to for _, to in smtp.delivered] == ["lab0@example.edu"]
+
+
+def test_send_email_endpoint_queues_and_worker_delivers(db, smtp, monkeypatch):
+    from backend.app.main import app
+
+    monkeypatch.setenv("SMTP_EMAIL", "ideal@example.edu")
+    monkeypatch.setenv("SMTP_PASSWORD", "secret")
+    lab = models.Lab(name="Vision Lab", domain="Robotics", email="vision@example.edu")
+    db.add(lab)
+    db.commit()
+
+    with TestClient(app) as client:
+        response = client.post("/collaboration/send-email", json={"to_lab_id": lab.id, "subject": "Hi", "body": "Hello"})
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+
+        deadline = time.monotonic() + 5
+        while client.get(f"/collaboration/outbox/{response.json()['id']}").json()["status"] != "sent":
+            assert time.monotonic() < deadline, "the worker never delivered the message"
+            time.sleep(0.05)
+
+    assert [to for _, to in smtp.delivered] == ["vision@example.edu"]
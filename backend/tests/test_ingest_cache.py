@@ -0,0 +1,24 @@
+import os
+
+from backend.app.services.ingest_cache import IngestCache
+
+
+def test_key_depends_on_extraction_settings():
+    keys = {
+        IngestCache.make_key("abc", "lab.pdf", 2, "pages0"),
+        IngestCache.make_key("abc", "lab.pdf", 2, "pages100"),
+        IngestCache.make_key("abc", "lab.pdf", 3, "pages0"),
+        IngestCache.make_key("abc", "lab.txt", 2, "pages0"),
+    }
+    assert len(keys) == 4
+
+
+def test_failed_disk_write_leaves_no_temp_file(tmp_path):
+    cache = IngestCache(directory=str(tmp_path))
+    cache.set("bad", {"extracted_lab": {"name": object()}})  # not JSON-serializable
+    assert os.listdir(tmp_path) == []
+    assert cache.get("bad") is not None  # the memory tier still has it
+
+    cache.set("good", {"extracted_lab": {"name": "Vision Lab"}})
+    assert os.listdir(tmp_path) == ["good.json"]
+    assert IngestCache(directory=str(tmp_path)).get("good") == {"extracted_lab": {"name": "Vision Lab"}}
@@ -0,0 +1,43 @@
+from backend.app import models
+from backend.app.services import lab_features
+
+
+def test_intern_tokens_tolerates_a_concurrent_insert(db, monkeypatch):
+    # Another writer commits "robotics" after our first lookup missed it
+    db.add(models.FeatureToken(value="robotics"))
+    db.commit()
+    lookups = []
+    real_token_ids = lab_features._token_ids
+
+    def token_ids(session, tokens):
+        lookups.append(tokens)
+        return {} if len(lookups) == 1 else real_token_ids(session, tokens)
+
+    monkeypatch.setattr(lab_features, "_token_ids", token_ids)
+    ids = lab_features.intern_tokens(db, {"robotics", "vision"})
+    db.commit()
+
+    assert set(ids) == {"robotics", "vision"}
+    assert dict(db.query(models.FeatureToken.value, models.FeatureToken.id)) == ids
+
+
+def test_snapshot_loads_only_the_tokens_its_labs_score_on(db, monkeypatch):
+    monkeypatch.setattr(lab_features, "_TOKEN_LOOKUP_BATCH", 2)
+    labs = [
+        models.Lab(name="Vision Lab", domain="Robotics", sub_domains="Vision, SLAM",
+                   computing_resources="GPU cluster", preferred_domains="Chemistry",
+                   collaboration_interests="Drones"),
+        models.Lab(name="Bio Lab", domain="Biology", sub_domains="Genomics",
+                   computing_resources="HPC, GPU cluster", collaboration_interests="Sequencing"),
+    ]
+    db.add_all(labs)
+    db.commit()
+    lab_features.backfill_features(db)
+
+    snapshot = lab_features.load_snapshot(db)
+    assert sorted(snapshot.vocab.values()) == ["genomics", "gpu cluster", "hpc", "slam", "vision"]
+
+    snapshot = lab_features.load_snapshot(db, [labs[0].id])
+    assert sorted(snapshot.vocab.values()) == ["gpu cluster", "slam", "vision"]
+    # Tokens the chunk doesn't reference can't overlap, so they needn't resolve
+    assert [snapshot.vocab[t] for t in snapshot.lookup_tokens(["vision", "hpc", "drones"])] == ["vision"]
@@ -0,0 +1,21 @@
+from backend.app import crud, models, schemas
+
+
+def test_created_ids_match_their_rows(db):
+    lab = models.Lab(name="Vision Lab", email="vision@example.edu", collaboration_interests="AI")
+    db.add(lab)
+    db.commit()
+
+    researchers = [
+        schemas.ResearcherCreate(name=f"R{i}", lab_id=lab.id, email=f"r{i}@example.edu")
+        for i in range(1200)
+    ]
+    results = crud.bulk_upsert_researchers(db, researchers, chunk_size=500)
+
+    assert [status for status, _, _ in results] == ["created"] * len(researchers)
+    names = dict(db.query(models.Researcher.id, models.Researcher.name))
+    assert [names[researcher_id] for _, researcher_id, _ in results] == [r.name for r in researchers]
+
+    # A second run updates the same rows
+    again = crud.bulk_upsert_researchers(db, researchers[:3])
+    assert again == [("updated", researcher_id, None) for _, researcher_id, _ in results[:3]]
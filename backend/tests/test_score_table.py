@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from backend.app import models
+from backend.app.services.lab_features import backfill_features
+from backend.app.services import score_table
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(score_table, "schedule_recompute", lambda: calls.append(True))
+    return calls
+
+
+@pytest.fixture
+def ideal(db):
+    ideal = models.IdealLab(name="IDEAL", domain="Robotics", sub_domains="ML")
+    db.add(ideal)
+    db.add_all(
+        models.Lab(name=f"Lab {i}", domain="Robotics" if i % 2 else "Chemistry",
+                   email=f"lab{i}@example.edu", collaboration_interests="AI")
+        for i in range(4)
+    )
+    db.commit()
+    backfill_features(db)  # what the lab write paths do
+    return ideal
+
+
+def score_rows(db) -> dict:
+    return dict(db.query(models.CollaborationScore.lab_id, models.CollaborationScore.score))
+
+
+def test_unscored_labs_are_scored_in_memory_without_writing(db, ideal, scheduled):
+    table = score_table.load_scores(db, ideal)
+    assert score_rows(db) == {}
+    assert scheduled
+
+    score_table.recompute_all(db, ideal)
+    stored = score_rows(db)
+    assert dict(zip(table.lab_ids.tolist(), table.scores.tolist())) == stored
+
+    rows = list(range(len(table.lab_ids)))
+    assert table.scored_labs(db, rows) == score_table.load_scores(db, ideal).scored_labs(db, rows)
+
+
+def test_stale_rows_are_served_while_the_recompute_runs(db, ideal, scheduled):
+    score_table.recompute_all(db, ideal)
+    before = score_rows(db)
+    scheduled.clear()
+
+    ideal.domain = "Chemistry"
+    db.commit()
+    table = score_table.load_scores(db, ideal)
+    assert dict(zip(table.lab_ids.tolist(), table.scores.tolist())) == before
+    assert score_rows(db) == before
+    assert scheduled
+
+
+def test_deleted_labs_are_skipped(db, ideal, scheduled):
+    score_table.recompute_all(db, ideal)
+    table = score_table.load_scores(db, ideal)
+    deleted = int(table.lab_ids[0])
+    db.query(models.Lab).filter(models.Lab.id == deleted).delete()
+    db.commit()
+
+    rows = list(range(len(table.lab_ids)))
+    assert [lab["lab_id"] for lab in table.scored_labs(db, rows)] == table.lab_ids.tolist()[1:]
+    # SQLite doesn't cascade the delete, so the score row is still there
+    assert deleted not in score_table.load_scores(db, ideal).lab_ids.tolist()
+
+
+def test_concurrent_recomputes_collapse(monkeypatch):
+    runs = []
+
+    def slow_recompute(db, ideal_lab=None):
+        runs.append(True)
+        time.sleep(0.2)
+
+    monkeypatch.setattr(score_table, "recompute_all", slow_recompute)
+    threads = [threading.Thread(target=score_table.recompute_all_scores) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The first call runs; the others ask it for at most one more pass
+    assert 1 <= len(runs) <= 2
+
@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.app import auth, crud
+from backend.app.main import app
+
+
+def on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def test_register_and_login_query_off_the_event_loop(db, monkeypatch):
+    calls = []
+    for name in ("get_user_by_email", "create_user"):
+        original = getattr(crud, name)
+
+        def recorded(*args, _original=original, _name=name, **kwargs):
+            calls.append((_name, on_event_loop()))
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(crud, name, recorded)
+
+    credentials = {"name": "Test User", "email": "user@example.edu", "password": "correct horse"}
+    with TestClient(app) as client:
+        assert client.post("/users/register", json=credentials).status_code == 200
+        assert client.post("/users/register", json=credentials).status_code == 400
+        assert client.post("/users/login", json=credentials).status_code == 200
+        assert client.post("/users/login", json={**credentials, "password": "wrong"}).status_code == 401
+
+    assert {name for name, _ in calls} == {"get_user_by_email", "create_user"}
+    assert not any(loop for _, loop in calls)
+
+
+def test_deactivation_revokes_cached_tokens(db):
+    credentials = {"name": "Test User", "email": "leaving@example.edu", "password": "correct horse"}
+    with TestClient(app) as client:
+        client.post("/users/register", json=credentials)
+        token = client.post("/users/login", json=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert client.get("/users/me", headers=headers).status_code == 200
+        assert auth.token_cache.get(token) is not None  # the next request is served from the cache
+
+        response = client.post("/users/me/deactivate", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["is_active"] is False
+        assert auth.token_cache.get(token) is None
+        assert client.get("/users/me", headers=headers).status_code == 403
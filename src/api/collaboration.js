@@ -21,4 +21,11 @@ export const sendEmail = async (payload) =>
       subject: payload.subject,   // ✅ Custom subject
       body: payload.body          // ✅ Custom body
     }),
-  });
\ No newline at end of file
+  });
+
+// Bulk outreach: { lab_ids } or { top_n, min_score }, optional subject_template / body_template
+export const sendCampaign = async (payload) =>
+  apiFetch("/collaboration/campaign", {
+    method: "POST",
+    body: JSON.stringify(payload),
+  });
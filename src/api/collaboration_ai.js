@@ -1,8 +1,11 @@
-export const startCollaborationAI = (task, onMessage) => {
+import { apiFetch } from "./client";
+
+// options: { stream, top_k, min_score }
+export const startCollaborationAI = (task, onMessage, options = {}) => {
     const ws = new WebSocket("ws://localhost:8001/collaboration-ai/ws");
   
     ws.onopen = () => {
-      ws.send(JSON.stringify({ task }));
+      ws.send(JSON.stringify({ task, ...options }));
     };
   
     ws.onmessage = (event) => {
@@ -11,4 +14,7 @@ export const startCollaborationAI = (task, onMessage) => {
   
     return ws;
   };
-  
\ No newline at end of file
+
+// Paginated collaboration ranking (no AI call) for loading deeper ranks
+export const getCollaborationRankings = (offset = 0, limit = 20, minScore = 0) =>
+  apiFetch(`/collaboration-ai/rankings?offset=${offset}&limit=${limit}&min_score=${minScore}`);
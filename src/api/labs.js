@@ -12,6 +12,31 @@ export const getLabs = async () => {
   }
 };
 
+// GET one page of labs (keyset pagination + filters + field projection)
+// params: { limit, cursor, domain, country, availability_status, equipment_level, sort, order, fields }
+export const getLabsPage = async (params = {}) => {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, v]) => v !== undefined && v !== null && v !== "")
+  );
+  const res = await fetch(`http://localhost:8001/labs/?${query}`);
+  if (!res.ok) throw new Error("Failed to fetch labs");
+  return { labs: await res.json(), nextCursor: res.headers.get("X-Next-Cursor") };
+};
+
+// POST a CSV or NDJSON file of labs for bulk creation
+// Returns { created, rejected, errors, errors_truncated }
+export const importLabs = async (file, format) => {
+  const data = new FormData();
+  data.append("file", file);
+  const query = format ? `?format=${format}` : "";
+  const res = await fetch(`http://localhost:8001/labs/import${query}`, { method: "POST", body: data });
+  if (!res.ok) throw new Error("Failed to import labs");
+  return await res.json();
+};
+
+// URL of the streaming export (use as a download link)
+export const labsExportUrl = (format = "ndjson") => `http://localhost:8001/labs/export?format=${format}`;
+
 // POST to create Lab (identity)
 export const createLabIdentity = async (labData) => {
   try {
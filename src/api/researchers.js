@@ -11,6 +11,11 @@ export const getResearchersSummary = () => apiFetch("/researchers/summary");
 export const createResearcher = (researcherData) =>
   apiFetch("/researchers", { method: "POST", body: JSON.stringify(researcherData) });
 
+// Create or update many researchers at once (matched by lab_id + email)
+// Returns { created, updated, error, total, results: [{ row, status, id, error }] }
+export const bulkUpsertResearchers = (researchers) =>
+  apiFetch("/researchers/bulk", { method: "POST", body: JSON.stringify(researchers) });
+
 // Update an existing researcher by ID
 export const updateResearcher = (id, researcherData) =>
   apiFetch(`/researchers/${id}`, { method: "PUT", body: JSON.stringify(researcherData) });
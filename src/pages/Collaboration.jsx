@@ -58,6 +58,15 @@ export default function Collaboration() {
     wsRef.current = startCollaborationAI(aiTask, (msg) => {
       if (msg.type === "status") {
         console.log(msg.message);
+      } else if (msg.type === "scores") {
+        // Scored labs arrive before the AI reasoning
+        setAiResults(
+          msg.data.labs.map((lab) => ({ ...lab, reason: "Generating insights...", recommended_projects: [] }))
+        );
+      } else if (msg.type === "recommendation") {
+        setAiResults((prev) =>
+          prev.map((lab) => (lab.lab_id === msg.data.lab_id ? msg.data : lab))
+        );
       } else if (msg.type === "result") {
         setLoadingAI(false);
 
@@ -72,7 +81,7 @@ export default function Collaboration() {
         setLoadingAI(false);
         alert(msg.message);
       }
-    });
+    }, { stream: true });
   };
 
   const openEmailDraft = (lab) => {
@@ -117,7 +126,7 @@ IDEAL Labs Team`;
         subject: emailDraft.subject,
         body: emailDraft.body
       });
-      alert("Email sent successfully!");
+      alert("Email queued for delivery!");
       setShowEmailModal(false);
     } catch (err) {
       console.error(err);